@@ -0,0 +1,238 @@
+# app/cli.py
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so that nothing is imported or warmed up yet.
+_STARTUP_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+
+async def probe():
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/", "raw_path": b"/",
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+    }
+    async with app.router.lifespan_context(app):
+        t2 = time.perf_counter()
+        await app(scope, receive, send)
+        t3 = time.perf_counter()
+    return t2, t3, messages[0]["status"]
+
+t2, t3, status = asyncio.run(probe())
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "startup_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "time_to_first_request_ms": (t3 - t0) * 1000,
+    "status": status,
+}))
+"""
+
+
+def export_session(args):
+    from app.utils.logging_utils import export_session_xlsx, has_session_log
+
+    if not has_session_log(args.session_id):
+        print(f"No activity log for session {args.session_id}", file=sys.stderr)
+        return 1
+    out = args.output or f"session_{args.session_id}.xlsx"
+    with open(out, "wb") as fh:
+        export_session_xlsx(args.session_id, fh)
+    print(f"Wrote {out}")
+    return 0
+
+
+def init_db(args):
+    import app.models  # noqa: F401  (register every table on Base.metadata)
+    from app.database import init_schema, verify_schema
+
+    if args.verify_only:
+        problems = verify_schema()
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        print("Schema matches the models" if not problems else f"{len(problems)} difference(s)")
+        return 1 if problems else 0
+
+    if init_schema(create=True, verify=True):
+        print("Schema created and verified")
+    else:
+        print("Schema fingerprint matches, nothing to do")
+    return 0
+
+
+def check_startup(args):
+    """Report import time, lifespan startup and time to first request in a cold interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _STARTUP_PROBE],
+        capture_output=True, text=True, env=dict(os.environ),
+    )
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        return proc.returncode
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            imports.append((int(self_us), int(cumulative_us), name.strip()))
+
+    print(f"import app.main          {report['import_ms']:>9.1f} ms")
+    print(f"lifespan startup         {report['startup_ms']:>9.1f} ms")
+    print(f"first request (GET /)    {report['first_request_ms']:>9.1f} ms  status={report['status']}")
+    print(f"time to first request    {report['time_to_first_request_ms']:>9.1f} ms")
+    if args.top:
+        print()
+        print(f"slowest imports (self time, top {args.top}):")
+        for self_us, cumulative_us, name in sorted(imports, reverse=True)[:args.top]:
+            print(f"  {self_us / 1000:>8.1f} ms  (cumulative {cumulative_us / 1000:>7.1f} ms)  {name}")
+    if args.json:
+        report["imports"] = [{"module": n, "self_ms": s / 1000, "cumulative_ms": c / 1000} for s, c, n in imports]
+        with open(args.json, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+def prune_access_logs(args):
+    from app.config import settings
+    from app.repositories.access_log_repository import apply_retention, list_partitions
+
+    days = args.days if args.days is not None else settings.ACCESS_LOG_RETENTION_DAYS
+    archive = None if args.no_archive else (args.archive_dir or settings.ACCESS_LOG_ARCHIVE_DIR or None)
+    dropped = apply_retention(days, archive)
+    for name in dropped:
+        print(f"Dropped {name}" + (f" (archived to {archive})" if archive else ""))
+    print(f"{len(list_partitions())} partition(s) kept")
+    return 0
+
+
+def rebuild_search(args):
+    import app.models  # noqa: F401
+    from app.database import IS_SQLITE, init_schema, write_engine
+    from app.repositories.item_search import rebuild_search_index
+
+    if not IS_SQLITE:
+        print("Full-text search needs SQLite (FTS5); nothing to rebuild", file=sys.stderr)
+        return 1
+    init_schema()
+    rebuild_search_index(write_engine)
+    print("Rebuilt items_fts")
+    return 0
+
+
+def import_users(args):
+    import asyncio
+
+    import app.models  # noqa: F401
+    from app.config import settings
+    from app.database import init_schema
+    from app.services.user_import import import_users_file
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    init_schema()
+
+    async def run():
+        done = {}
+        async for event in import_users_file(
+            args.path, fmt,
+            batch_size=args.batch_size or settings.USER_IMPORT_BATCH_SIZE,
+            chunk_size=args.chunk_size or settings.USER_IMPORT_CHUNK_SIZE,
+            workers=args.workers or settings.USER_IMPORT_HASH_WORKERS,
+        ):
+            if event["event"] == "error":
+                print(f"record {event['index']}: {event['detail']}", file=sys.stderr)
+            else:
+                print(f"{event['event']}: {event['processed']} processed, {event['created']} created, "
+                      f"{event['failed']} failed, {event['elapsed_ms'] / 1000:.1f} s")
+                done = event
+        return done
+
+    done = asyncio.run(run())
+    return 1 if done.get("failed") else 0
+
+
+def compact_rollups(args):
+    import app.models  # noqa: F401
+    from app.config import settings
+    from app.database import SessionLocal, init_schema
+    from app.repositories.rollup_repository import RollupRepository
+
+    init_schema()
+    db = SessionLocal()
+    try:
+        repo = RollupRepository(db)
+        if args.rebuild_session_stats:
+            print(f"Rebuilt session counters for {repo.rebuild_session_stats()} user(s)")
+        folded = repo.compact(
+            settings.ROLLUP_MINUTE_RETENTION_HOURS * 3600,
+            settings.ROLLUP_HOUR_RETENTION_DAYS * 86400,
+            settings.ROLLUP_DAY_RETENTION_DAYS * 86400,
+        )
+    finally:
+        db.close()
+    print(f"Folded {folded} rollup row(s) into coarser buckets")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export-session", help="export a session activity log as .xlsx")
+    p.add_argument("session_id")
+    p.add_argument("-o", "--output", help="output path (default: session_<id>.xlsx)")
+    p.set_defaults(func=export_session)
+
+    p = sub.add_parser("init-db", help="create missing tables and indexes, then stamp the schema fingerprint")
+    p.add_argument("--verify-only", action="store_true", help="only report differences, change nothing")
+    p.set_defaults(func=init_db)
+
+    p = sub.add_parser("check-startup", help="measure import time and time to first request")
+    p.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    p.add_argument("--json", help="also write the full report to this path")
+    p.set_defaults(func=check_startup)
+
+    p = sub.add_parser("prune-access-logs", help="apply the access log retention policy now")
+    p.add_argument("--days", type=int, help="retention in days (default: ACCESS_LOG_RETENTION_DAYS)")
+    p.add_argument("--archive-dir", help="where to write .ndjson.gz archives (default: ACCESS_LOG_ARCHIVE_DIR)")
+    p.add_argument("--no-archive", action="store_true", help="drop old partitions without archiving them")
+    p.set_defaults(func=prune_access_logs)
+
+    p = sub.add_parser("rebuild-search", help="re-index every item for GET /items/search")
+    p.set_defaults(func=rebuild_search)
+
+    p = sub.add_parser("import-users", help="create users in bulk from a CSV or NDJSON file")
+    p.add_argument("path", help="CSV with a header row (username,email,password[,full_name]) or NDJSON")
+    p.add_argument("--format", choices=("csv", "ndjson"), help="default: from the file extension")
+    p.add_argument("--batch-size", type=int, help="records validated and checked per batch (default: USER_IMPORT_BATCH_SIZE)")
+    p.add_argument("--chunk-size", type=int, help="rows per insert transaction (default: USER_IMPORT_CHUNK_SIZE)")
+    p.add_argument("--workers", type=int, help="hashing processes (default: USER_IMPORT_HASH_WORKERS, 0 = CPU count)")
+    p.set_defaults(func=import_users)
+
+    p = sub.add_parser("compact-rollups", help="fold old traffic rollup buckets into coarser ones now")
+    p.add_argument("--rebuild-session-stats", action="store_true", help="also recompute per-user session counters from user_sessions")
+    p.set_defaults(func=compact_rollups)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
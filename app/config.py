@@ -1,4 +1,6 @@
 # app/config.py
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -9,6 +11,31 @@ class Settings(BaseSettings):
         env="DATABASE_URL"
     )
 
+    # Use an AsyncEngine (aiosqlite for SQLite) for request handling. The URL
+    # is derived from DATABASE_URL unless ASYNC_DATABASE_URL is set.
+    DB_ASYNC: bool = Field(default=False, env="DB_ASYNC")
+    ASYNC_DATABASE_URL: Optional[str] = Field(default=None, env="ASYNC_DATABASE_URL")
+
+    # "default" keeps driver defaults. "performance" turns on WAL and the
+    # SQLITE_* pragmas below, sizes the read pool explicitly and sends every
+    # write through one dedicated writer connection.
+    DB_PROFILE: str = Field(default="default", env="DB_PROFILE")
+    DB_POOL_SIZE: int = Field(default=8, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=8, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, env="DB_POOL_TIMEOUT")
+    SQLITE_SYNCHRONOUS: str = Field(default="NORMAL", env="SQLITE_SYNCHRONOUS")
+    SQLITE_MMAP_SIZE: int = Field(default=256 * 1024 * 1024, env="SQLITE_MMAP_SIZE")
+    # negative values are KiB, as in PRAGMA cache_size
+    SQLITE_CACHE_SIZE: int = Field(default=-64 * 1024, env="SQLITE_CACHE_SIZE")
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(default=5000, env="SQLITE_BUSY_TIMEOUT_MS")
+
+    # Schema DDL runs from the lifespan handler, and only when the stored
+    # schema fingerprint differs from the models. Turn DB_INIT_SCHEMA off on
+    # workers when migrations run as a deploy step (python -m app.cli init-db);
+    # DB_VERIFY_SCHEMA fails startup if tables, columns or indexes are missing.
+    DB_INIT_SCHEMA: bool = Field(default=True, env="DB_INIT_SCHEMA")
+    DB_VERIFY_SCHEMA: bool = Field(default=False, env="DB_VERIFY_SCHEMA")
+
     SECRET_KEY: str = Field(
         default="5190431c647cd269d64bd13be15bf26837b633b5192b431c97b2a2b6080aca63",
         env="SECRET_KEY"
@@ -21,6 +48,156 @@ class Settings(BaseSettings):
         env="ACCESS_TOKEN_EXPIRE_MINUTES"
     )
 
+    # Access log pipeline: rows are queued in memory and bulk-inserted
+    # every ACCESS_LOG_BATCH_SIZE rows or ACCESS_LOG_FLUSH_INTERVAL_MS.
+    # ACCESS_LOG_BACKPRESSURE is one of "drop", "block" or "sample".
+    ACCESS_LOG_QUEUE_SIZE: int = Field(default=10000, env="ACCESS_LOG_QUEUE_SIZE")
+    ACCESS_LOG_BATCH_SIZE: int = Field(default=500, env="ACCESS_LOG_BATCH_SIZE")
+    ACCESS_LOG_FLUSH_INTERVAL_MS: int = Field(default=250, env="ACCESS_LOG_FLUSH_INTERVAL_MS")
+    ACCESS_LOG_BACKPRESSURE: str = Field(default="drop", env="ACCESS_LOG_BACKPRESSURE")
+    ACCESS_LOG_SAMPLE_RATE: float = Field(default=0.1, env="ACCESS_LOG_SAMPLE_RATE")
+    ACCESS_LOG_SHUTDOWN_TIMEOUT: float = Field(default=10.0, env="ACCESS_LOG_SHUTDOWN_TIMEOUT")
+
+    # With ACCESS_LOG_PARTITIONED rows go to one table per UTC day
+    # (access_logs_YYYYMMDD), created on first write. Partitions older than
+    # ACCESS_LOG_RETENTION_DAYS (0 = keep forever) are gzipped to
+    # ACCESS_LOG_ARCHIVE_DIR (empty = no archive) and dropped.
+    ACCESS_LOG_PARTITIONED: bool = Field(default=True, env="ACCESS_LOG_PARTITIONED")
+    ACCESS_LOG_RETENTION_DAYS: int = Field(default=30, env="ACCESS_LOG_RETENTION_DAYS")
+    ACCESS_LOG_ARCHIVE_DIR: str = Field(default="logs/archive", env="ACCESS_LOG_ARCHIVE_DIR")
+    ACCESS_LOG_RETENTION_INTERVAL: float = Field(default=3600.0, env="ACCESS_LOG_RETENTION_INTERVAL")
+
+    # Per-session text/CSV logs are buffered in memory and written every
+    # SESSION_LOG_FLUSH_INTERVAL_MS or once SESSION_LOG_BUFFER_BYTES are
+    # pending, through at most SESSION_LOG_MAX_OPEN_FILES open handles.
+    # Logs of ended sessions are gzipped when SESSION_LOG_COMPRESS_ON_END.
+    SESSION_LOG_BUFFER_BYTES: int = Field(default=64 * 1024, env="SESSION_LOG_BUFFER_BYTES")
+    SESSION_LOG_FLUSH_INTERVAL_MS: int = Field(default=1000, env="SESSION_LOG_FLUSH_INTERVAL_MS")
+    SESSION_LOG_MAX_OPEN_FILES: int = Field(default=128, env="SESSION_LOG_MAX_OPEN_FILES")
+    SESSION_LOG_FSYNC: bool = Field(default=False, env="SESSION_LOG_FSYNC")
+    SESSION_LOG_COMPRESS_ON_END: bool = Field(default=True, env="SESSION_LOG_COMPRESS_ON_END")
+
+    # Where login/logout state goes. "database" commits each change to
+    # user_sessions before responding; "write_behind" keeps changed sessions
+    # in memory, appends them to a journal in SESSION_JOURNAL_DIR and writes
+    # them in batches every SESSION_STORE_FLUSH_INTERVAL_MS. With more than
+    # one worker, enable CACHE_BUS_ENABLED so logouts reach the others.
+    SESSION_STORE: str = Field(default="write_behind", env="SESSION_STORE")
+    SESSION_STORE_FLUSH_INTERVAL_MS: int = Field(default=200, env="SESSION_STORE_FLUSH_INTERVAL_MS")
+    SESSION_STORE_BATCH_SIZE: int = Field(default=1000, env="SESSION_STORE_BATCH_SIZE")
+    SESSION_JOURNAL_DIR: str = Field(default="logs/session_journal", env="SESSION_JOURNAL_DIR")
+    SESSION_JOURNAL_FSYNC: bool = Field(default=False, env="SESSION_JOURNAL_FSYNC")
+    # A signed session id not found in user_sessions counts as active only
+    # this long after login, while its create may still be in flight
+    SESSION_STORE_GRACE_SECONDS: float = Field(default=60.0, env="SESSION_STORE_GRACE_SECONDS")
+
+    # Requests the logging middleware leaves alone: comma-separated paths,
+    # a trailing "*" matches a prefix. LOG_SAMPLE_RATES logs only a fraction
+    # of the requests to some routes, as "route template=rate" pairs (e.g.
+    # "/items/{item_id}=0.1"); the traffic rollups count only logged requests.
+    LOG_SKIP_PATHS: str = Field(default="/, /docs*, /openapi.json, /metrics", env="LOG_SKIP_PATHS")
+    LOG_SAMPLE_RATES: str = Field(default="", env="LOG_SAMPLE_RATES")
+
+    # Active-session lookups done by the logging middleware
+    SESSION_CACHE_SIZE: int = Field(default=10000, env="SESSION_CACHE_SIZE")
+    SESSION_CACHE_TTL: float = Field(default=30.0, env="SESSION_CACHE_TTL")
+
+    # Authenticated principals (UserRead) cached by username
+    PRINCIPAL_CACHE_SIZE: int = Field(default=10000, env="PRINCIPAL_CACHE_SIZE")
+    PRINCIPAL_CACHE_TTL: float = Field(default=60.0, env="PRINCIPAL_CACHE_TTL")
+    # Verified tokens are cached until their exp; logout revokes them.
+    # Revocations are kept until the token expires and never evicted early,
+    # so TOKEN_REVOCATION_SIZE must cover the logouts of one token lifetime
+    # (ACCESS_TOKEN_EXPIRE_MINUTES); past it, logout answers 503.
+    TOKEN_CACHE_SIZE: int = Field(default=10000, env="TOKEN_CACHE_SIZE")
+    TOKEN_REVOCATION_SIZE: int = Field(default=100000, env="TOKEN_REVOCATION_SIZE")
+    # Put id/email/full_name/is_active claims into login tokens so that
+    # get_current_user can skip the users table. Claims are trusted until
+    # the token expires.
+    TOKEN_EMBED_PRINCIPAL: bool = Field(default=False, env="TOKEN_EMBED_PRINCIPAL")
+
+    # Cross-worker cache invalidation through the cache_invalidations table.
+    # Turn on when running more than one worker: each worker polls the table
+    # every CACHE_BUS_POLL_INTERVAL_MS, which bounds how long a logout,
+    # revocation or deactivation takes to reach the other workers' caches.
+    CACHE_BUS_ENABLED: bool = Field(default=False, env="CACHE_BUS_ENABLED")
+    CACHE_BUS_POLL_INTERVAL_MS: int = Field(default=100, env="CACHE_BUS_POLL_INTERVAL_MS")
+    CACHE_BUS_RETENTION_SECONDS: float = Field(default=300.0, env="CACHE_BUS_RETENTION_SECONDS")
+
+    # Password hashing process pool (0 = one worker per CPU core). Callers
+    # beyond HASH_MAX_CONCURRENCY wait up to HASH_QUEUE_TIMEOUT_MS, and at
+    # most HASH_MAX_QUEUE of them; the rest get a 503.
+    HASH_WORKERS: int = Field(default=0, env="HASH_WORKERS")
+    HASH_MAX_CONCURRENCY: int = Field(default=0, env="HASH_MAX_CONCURRENCY")
+    HASH_MAX_QUEUE: int = Field(default=64, env="HASH_MAX_QUEUE")
+    HASH_QUEUE_TIMEOUT_MS: int = Field(default=1000, env="HASH_QUEUE_TIMEOUT_MS")
+
+    # Admission control: concurrent requests per route class (0 = unlimited)
+    # and how long a request may wait for a slot before it gets a 503. At
+    # most ADMISSION_MAX_QUEUE requests wait per class.
+    ADMISSION_ENABLED: bool = Field(default=True, env="ADMISSION_ENABLED")
+    ADMISSION_AUTH_LIMIT: int = Field(default=32, env="ADMISSION_AUTH_LIMIT")
+    ADMISSION_AUTH_QUEUE_MS: int = Field(default=1000, env="ADMISSION_AUTH_QUEUE_MS")
+    ADMISSION_ITEM_WRITE_LIMIT: int = Field(default=32, env="ADMISSION_ITEM_WRITE_LIMIT")
+    ADMISSION_ITEM_WRITE_QUEUE_MS: int = Field(default=1000, env="ADMISSION_ITEM_WRITE_QUEUE_MS")
+    ADMISSION_ITEM_READ_LIMIT: int = Field(default=128, env="ADMISSION_ITEM_READ_LIMIT")
+    ADMISSION_ITEM_READ_QUEUE_MS: int = Field(default=2000, env="ADMISSION_ITEM_READ_QUEUE_MS")
+    ADMISSION_HEALTH_LIMIT: int = Field(default=0, env="ADMISSION_HEALTH_LIMIT")
+    ADMISSION_HEALTH_QUEUE_MS: int = Field(default=0, env="ADMISSION_HEALTH_QUEUE_MS")
+    ADMISSION_MAX_QUEUE: int = Field(default=256, env="ADMISSION_MAX_QUEUE")
+
+    # Per-IP token bucket on POST /auth/login (0 = off); throttled clients get a 429
+    LOGIN_RATE_PER_MINUTE: float = Field(default=30, env="LOGIN_RATE_PER_MINUTE")
+    LOGIN_BURST: int = Field(default=10, env="LOGIN_BURST")
+    LOGIN_THROTTLE_MAX_IPS: int = Field(default=10000, env="LOGIN_THROTTLE_MAX_IPS")
+    # Comma-separated proxy addresses whose X-Forwarded-For the throttle
+    # believes; from anyone else the header is ignored and the peer counts
+    TRUSTED_PROXIES: str = Field(default="", env="TRUSTED_PROXIES")
+
+    # GET /items paging and NDJSON streaming
+    ITEMS_MAX_PAGE_SIZE: int = Field(default=1000, env="ITEMS_MAX_PAGE_SIZE")
+    ITEMS_STREAM_BATCH_SIZE: int = Field(default=500, env="ITEMS_STREAM_BATCH_SIZE")
+
+    # Serialized GET /items bodies kept per (owner, items version, query);
+    # 0 disables the cache (ETags and 304s still work)
+    ITEM_RESPONSE_CACHE_SIZE: int = Field(default=1024, env="ITEM_RESPONSE_CACHE_SIZE")
+
+    # POST /items/bulk
+    ITEM_BULK_CHUNK_SIZE: int = Field(default=500, env="ITEM_BULK_CHUNK_SIZE")
+    ITEM_BULK_MAX_ROWS: int = Field(default=10000, env="ITEM_BULK_MAX_ROWS")
+
+    # Rollups behind /admin/stats: request counts per minute, route template,
+    # method, status and user are written with each access-log batch, and
+    # per-user session counters with each session change. Every
+    # ROLLUP_COMPACT_INTERVAL seconds, minutes older than
+    # ROLLUP_MINUTE_RETENTION_HOURS are folded into hours, hours older than
+    # ROLLUP_HOUR_RETENTION_DAYS into days, and days older than
+    # ROLLUP_DAY_RETENTION_DAYS dropped (0 = kept).
+    ROLLUPS_ENABLED: bool = Field(default=True, env="ROLLUPS_ENABLED")
+    ROLLUP_MINUTE_RETENTION_HOURS: int = Field(default=48, env="ROLLUP_MINUTE_RETENTION_HOURS")
+    ROLLUP_HOUR_RETENTION_DAYS: int = Field(default=31, env="ROLLUP_HOUR_RETENTION_DAYS")
+    ROLLUP_DAY_RETENTION_DAYS: int = Field(default=0, env="ROLLUP_DAY_RETENTION_DAYS")
+    ROLLUP_COMPACT_INTERVAL: float = Field(default=600.0, env="ROLLUP_COMPACT_INTERVAL")
+    # GET /admin/stats/traffic answers at most this many buckets per query
+    ADMIN_STATS_MAX_BUCKETS: int = Field(default=1440, env="ADMIN_STATS_MAX_BUCKETS")
+
+    # Bulk user import (python -m app.cli import-users, POST /admin/users/import).
+    # Records are validated, checked for duplicates and inserted
+    # USER_IMPORT_BATCH_SIZE at a time, in transactions of
+    # USER_IMPORT_CHUNK_SIZE rows. USER_IMPORT_HASH_WORKERS processes hash the
+    # passwords (0 = one per CPU core); the endpoint runs one import at a time.
+    USER_IMPORT_BATCH_SIZE: int = Field(default=1000, env="USER_IMPORT_BATCH_SIZE")
+    USER_IMPORT_CHUNK_SIZE: int = Field(default=500, env="USER_IMPORT_CHUNK_SIZE")
+    USER_IMPORT_HASH_WORKERS: int = Field(default=0, env="USER_IMPORT_HASH_WORKERS")
+
+    # Comma-separated usernames allowed on the /admin endpoints
+    ADMIN_USERNAMES: str = Field(default="", env="ADMIN_USERNAMES")
+
+    # Instrumentation. METRICS_ENABLED serves Prometheus text on /metrics;
+    # SERVER_TIMING_ENABLED adds a Server-Timing header to every response.
+    METRICS_ENABLED: bool = Field(default=False, env="METRICS_ENABLED")
+    SERVER_TIMING_ENABLED: bool = Field(default=False, env="SERVER_TIMING_ENABLED")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
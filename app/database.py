@@ -1,32 +1,311 @@
 # app/database.py
-from sqlalchemy import create_engine
+import hashlib
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Column, DateTime, String, Table, create_engine, delete, event, inspect, insert, select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
 
 from app.config import settings
+from app.utils.metrics import install_db_hooks
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 DATABASE_URL = settings.DATABASE_URL
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+PERFORMANCE_PROFILE = settings.DB_PROFILE == "performance"
+
+if settings.DB_PROFILE not in ("default", "performance"):
+    raise ValueError(f"Unknown DB_PROFILE: {settings.DB_PROFILE!r}")
 
 connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
+if IS_SQLITE:
     connect_args = {"check_same_thread": False}
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
+def _make_engine(factory, url: str, writer: bool = False):
+    kwargs = {}
+    if PERFORMANCE_PROFILE:
+        kwargs.update(
+            pool_size=1 if writer else settings.DB_POOL_SIZE,
+            max_overflow=0 if writer else settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    eng = factory(url, connect_args=connect_args, **kwargs)
+    if PERFORMANCE_PROFILE and IS_SQLITE:
+        event.listen(getattr(eng, "sync_engine", eng), "connect", _set_sqlite_pragmas)
+    return eng
+
+
+def _routing_session(read_engine, write_engine):
+    class RoutingSession(Session):
+        """
+        Flushes and DML statements go to the single writer, reads to the pool.
+        ORM bulk DML (execute(insert(Model), rows)) asks for its connection
+        by mapper only, so once a transaction runs any DML the rest of it,
+        reads included, stays on the writer.
+        """
+
+        _writing = False
+
+        def get_bind(self, mapper=None, clause=None, **kw):
+            if self._writing or self._flushing or isinstance(clause, UpdateBase):
+                return write_engine
+            return read_engine
+
+    @event.listens_for(RoutingSession, "do_orm_execute")
+    def _pin_to_writer(state):
+        if state.is_insert or state.is_update or state.is_delete:
+            state.session._writing = True
+
+    @event.listens_for(RoutingSession, "after_transaction_end")
+    def _unpin(session, transaction):
+        if transaction.parent is None:
+            session._writing = False
+
+    return RoutingSession
+
+
+def to_async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:"):
+        return "postgresql+asyncpg:" + url[len("postgresql:"):]
+    return url
+
+
+engine = _make_engine(create_engine, DATABASE_URL)
+
+# With the performance profile on SQLite all writes are serialized through one
+# connection, so writers queue in the pool instead of failing with
+# "database is locked", while WAL lets the read pool run alongside.
+write_engine = engine
+if PERFORMANCE_PROFILE and IS_SQLITE:
+    write_engine = _make_engine(create_engine, DATABASE_URL, writer=True)
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine,
+    class_=_routing_session(engine, write_engine) if write_engine is not engine else Session,
 )
 
+# Async path (settings.DB_ASYNC). The sync engine above is always created:
+# background writers and the CLI use it from worker threads.
+async_engine = None
+async_write_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+    async_engine = _make_engine(create_async_engine, ASYNC_DATABASE_URL)
+    async_write_engine = async_engine
+    if write_engine is not engine:
+        async_write_engine = _make_engine(create_async_engine, ASYNC_DATABASE_URL, writer=True)
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        # objects are read after commit outside of the greenlet, so don't expire them
+        expire_on_commit=False,
+        sync_session_class=(
+            _routing_session(async_engine.sync_engine, async_write_engine.sync_engine)
+            if async_write_engine is not async_engine else Session
+        ),
+    )
+
+install_db_hooks(*{engine, write_engine, async_engine, async_write_engine} - {None})
+
 Base = declarative_base()   # <-- THIS MUST EXIST
 
+# One row holding the fingerprint of the metadata the schema was last created
+# or verified against; startup skips all DDL while it matches.
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("fingerprint", String(64), primary_key=True),
+    Column("applied_at", DateTime(timezone=True)),
+)
+
+
+class UnitOfWork:
+    """
+    The database session of one request, shared by the logging middleware
+    (which keeps it on ``request.state.uow``), ``get_db`` and the services
+    built on it. The session is created on first use and checks a connection
+    out of the pool only at its first statement, so a request that never
+    queries holds none. The middleware closes it once the request is done.
+    """
+
+    __slots__ = ("_session",)
 
-def get_db() -> Session:
-    db = SessionLocal()
-    try:
+    def __init__(self):
+        self._session = None
+
+    @property
+    def session(self) -> Union[Session, "AsyncSession"]:
+        if self._session is None:
+            self._session = AsyncSessionLocal() if AsyncSessionLocal is not None else SessionLocal()
+        return self._session
+
+    async def close(self):
+        session, self._session = self._session, None
+        if session is None:
+            return
+        if isinstance(session, Session):
+            session.close()
+        else:
+            await session.close()
+
+
+@asynccontextmanager
+async def db_session(uow: Optional[UnitOfWork] = None) -> AsyncIterator[Union[Session, "AsyncSession"]]:
+    """
+    A session for the configured mode: AsyncSession if DB_ASYNC, else Session.
+    With ``uow``, that request's session, left open for its owner to close.
+    """
+    if uow is not None:
+        db = uow.session
+        if not db.is_active:
+            # a route failed mid-flush; the middleware still reads through it
+            await (run_in_threadpool(db.rollback) if isinstance(db, Session) else db.rollback())
+        yield db
+    elif AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def get_db(request: Request) -> AsyncIterator[Union[Session, "AsyncSession"]]:
+    async with db_session(getattr(request.state, "uow", None)) as db:
         yield db
-    finally:
-        db.close()
+
+
+async def run_db(db, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run ``fn(sync_session, *args, **kwargs)`` without blocking the event loop.
+
+    An AsyncSession runs it through ``run_sync`` on the async driver; a plain
+    Session runs it in the threadpool.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    return await db.run_sync(fn, *args, **kwargs)
+
+
+# Objects SQLAlchemy does not model (FTS5 tables, triggers), SQLite only:
+# (name, CREATE statement, statements to run once right after creating it).
+# create_schema runs them after create_all; they are part of the fingerprint.
+raw_ddl: List[Tuple[str, str, Sequence[str]]] = []
+
+
+def register_ddl(name: str, create: str, populate: Sequence[str] = ()):
+    raw_ddl.append((name, create, tuple(populate)))
+
+
+def _sqlite_objects(conn) -> set:
+    return {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master")}
+
+
+def schema_fingerprint() -> str:
+    """Hash of every table, column and index registered on Base.metadata."""
+    digest = hashlib.sha1()
+    for table in Base.metadata.sorted_tables:
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"{column.name}:{column.type!r}:{column.nullable}".encode())
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            digest.update(f"{index.name}:{[c.name for c in index.columns]}".encode())
+    if IS_SQLITE:
+        for name, create, _ in raw_ddl:
+            digest.update(f"{name}:{create}".encode())
+    return digest.hexdigest()
+
+
+def verify_schema(bind=None) -> List[str]:
+    """Return what is missing from the database compared to the models."""
+    inspector = inspect(bind or write_engine)
+    existing = set(inspector.get_table_names())
+    problems = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            problems.append(f"missing table {table.name}")
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        problems.extend(f"missing column {table.name}.{c.name}" for c in table.columns if c.name not in columns)
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        problems.extend(f"missing index {i.name}" for i in table.indexes if i.name not in indexes)
+    if IS_SQLITE and raw_ddl:
+        with (bind or write_engine).connect() as conn:
+            objects = _sqlite_objects(conn)
+        problems.extend(f"missing {name}" for name, _, _ in raw_ddl if name not in objects)
+    return problems
+
+
+def init_schema(create: bool = True, verify: bool = False) -> bool:
+    """
+    Create and/or verify the schema unless the stored fingerprint already
+    matches the models. Returns False when it was skipped.
+    """
+    from datetime import datetime, timezone
+
+    fingerprint = schema_fingerprint()
+    with write_engine.connect() as conn:
+        try:
+            current = conn.execute(select(schema_version.c.fingerprint)).scalar()
+        except DBAPIError:
+            current = None  # no marker table yet
+    if current == fingerprint:
+        return False
+
+    if create:
+        create_schema()
+    if verify:
+        problems = verify_schema()
+        if problems:
+            raise RuntimeError("Database schema does not match the models: " + "; ".join(problems))
+    if create or verify:
+        with write_engine.begin() as conn:
+            conn.execute(delete(schema_version))
+            conn.execute(insert(schema_version).values(
+                fingerprint=fingerprint, applied_at=datetime.now(timezone.utc),
+            ))
+    return True
+
+
+def create_schema(bind=None):
+    # create_all() skips indexes on tables that already exist, so add those too
+    bind = bind or write_engine
+    Base.metadata.create_all(bind=bind)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    if IS_SQLITE and raw_ddl:
+        with bind.begin() as conn:
+            objects = _sqlite_objects(conn)
+            for name, create, populate in raw_ddl:
+                if name not in objects:
+                    conn.exec_driver_sql(create)
+                    for statement in populate:
+                        conn.exec_driver_sql(statement)
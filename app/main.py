@@ -1,31 +1,135 @@
 # app/main.py
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
-from app.database import Base, engine
+from app.config import settings
+from app.database import async_engine, async_write_engine, init_schema
 # import models so they register with Base (ensure logs imported)
 from app.models.user import User  # noqa: F401
 from app.models.item import Item  # noqa: F401
 from app.models import logs  # noqa: F401
+from app.routers.admin_router import router as admin_router
 from app.routers.auth_router import router as auth_router
 from app.routers.item_router import router as item_router
+from app.routers.metrics_router import router as metrics_router
+from app.services.access_log_writer import access_log_writer
+from app.services.session_log_writer import session_log_writer
+from app.services.invalidation_bus import invalidation_bus
+from app.services.item_service import item_response_cache
+from app.services.session_service import session_cache, session_store
+from app.repositories.user_repository import principal_cache
+from app.utils.hashing import hashing_executor
+from app.utils.jwt_utils import revoked_tokens, token_cache
+from app.utils import metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables (for demo; use Alembic in real apps). Skipped when the
+    # schema fingerprint stored in the database matches the models.
+    if settings.DB_INIT_SCHEMA or settings.DB_VERIFY_SCHEMA:
+        await run_in_threadpool(init_schema, settings.DB_INIT_SCHEMA, settings.DB_VERIFY_SCHEMA)
+    # persist sessions a previous run journaled but did not write out
+    await run_in_threadpool(session_store.recover)
+    session_store.start()
+    access_log_writer.start()
+    session_log_writer.start()
+    invalidation_bus.start()
+    yield
+    # persist sessions, then flush queued access-log rows and session log
+    # buffers before the worker exits; logouts go out on the bus last
+    await session_store.stop()
+    await access_log_writer.stop()
+    await session_log_writer.stop()
+    await invalidation_bus.stop()
+    # waits for in-flight hashes, so off the loop
+    await asyncio.to_thread(hashing_executor.shutdown)
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_write_engine is not async_engine:
+        await async_write_engine.dispose()
 
-# Create tables (for demo; use Alembic in real apps)
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Clean Architecture JWT Demo",
     docs_url="/docs",
     redoc_url=None,
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 # register logging middleware BEFORE routers
-from app.middleware.logging_middleware import session_logging_middleware
-app.middleware("http")(session_logging_middleware)
+from app.middleware.logging_middleware import SessionLoggingMiddleware, parse_sample_rates, parse_skip_paths
+_skip_paths, _skip_prefixes = parse_skip_paths(settings.LOG_SKIP_PATHS)
+app.add_middleware(
+    SessionLoggingMiddleware,
+    skip_paths=_skip_paths,
+    skip_prefixes=_skip_prefixes,
+    sample_rates=parse_sample_rates(settings.LOG_SAMPLE_RATES),
+)
+
+if settings.ADMISSION_ENABLED:
+    # shed load before the logging middleware does any work
+    from app.middleware.admission import AdmissionMiddleware, admission_controller
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        trusted_proxies=frozenset(p.strip() for p in settings.TRUSTED_PROXIES.split(",") if p.strip()),
+    )
+
+if metrics.ENABLED:
+    # outermost, so that it times the logging middleware as well
+    app.add_middleware(metrics.MetricsMiddleware)
+
+if metrics.METRICS_ENABLED:
+    metrics.register_gauge(
+        "queue_depth", "Items waiting in in-process queues",
+        lambda: {
+            "access_log": access_log_writer.qsize(),
+            "hashing": hashing_executor.waiting,
+        },
+        labelname="queue",
+    )
+    metrics.register_gauge(
+        "hashing_in_flight", "Password hashes currently running", lambda: hashing_executor.in_flight,
+    )
+    metrics.register_gauge(
+        "access_log_records", "Access log pipeline counters", access_log_writer.stats, labelname="state",
+    )
+    if settings.ADMISSION_ENABLED:
+        metrics.register_gauge(
+            "admission", "Admission control and login throttle counters", admission_controller.stats, labelname="stat",
+        )
+    metrics.register_gauge(
+        "token_revocations", "Revoked tokens kept until they expire", revoked_tokens.stats, labelname="stat",
+    )
+    metrics.register_gauge(
+        "cache_invalidation_bus", "Cross-worker invalidation bus counters", invalidation_bus.stats, labelname="stat",
+    )
+    metrics.register_gauge(
+        "session_store", "Write-behind session store counters", session_store.stats, labelname="stat",
+    )
+    metrics.register_gauge(
+        "session_log_writer", "Session text/CSV log writer counters", session_log_writer.stats, labelname="state",
+    )
+    metrics.register_gauge(
+        "cache_stats", "In-process cache counters",
+        lambda: {
+            f"{name}_{key}": value
+            for name, cache in (("session", session_cache), ("principal", principal_cache), ("token", token_cache), ("item_response", item_response_cache))
+            for key, value in cache.stats().items()
+        },
+        labelname="stat",
+    )
+    app.include_router(metrics_router)
 
 app.include_router(auth_router)
 app.include_router(item_router)
+app.include_router(admin_router)
 
 @app.get("/", tags=["health"])
-def health_check():
+async def health_check():
     return {"status": "ok"}
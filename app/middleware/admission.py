@@ -0,0 +1,240 @@
+# app/middleware/admission.py
+"""
+Admission control: bounded concurrency per route class, plus a per-IP
+token bucket on /auth/login.
+
+A request that cannot get a slot waits in a FIFO queue for at most the
+class's queue timeout and is then answered 503 with Retry-After, without
+reaching the app. Throttled logins get a 429.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Optional
+
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.utils.cache import TTLCache, MISSING
+
+LOGIN_PATH = "/auth/login"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+class RouteClass:
+    def __init__(self, name: str, limit: int, queue_timeout_ms: int, max_queue: int):
+        self.name = name
+        # 0 = unlimited
+        self.limit = limit
+        self.queue_timeout = queue_timeout_ms / 1000.0
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting up to ``queue_timeout``. False when rejected."""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if self.queue_timeout <= 0 or len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            return False
+
+        self.queued += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)
+        except BaseException as exc:
+            if fut.done() and not fut.cancelled():
+                # the slot was handed over just as we gave up: pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            if isinstance(exc, asyncio.TimeoutError):
+                self.rejected_timeout += 1
+                return False
+            raise
+        self.admitted += 1
+        return True
+
+    def release(self):
+        # hand the slot straight to the oldest live waiter, if any
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+class TokenBucket:
+    """Per-key token buckets; idle keys drop out once their bucket would be full again."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._buckets = TTLCache(maxsize=max_keys, ttl=burst / self.rate if self.rate else 0)
+        self.allowed = 0
+        self.throttled = 0
+
+    def take(self, key: str) -> float:
+        """Consume a token for ``key``: 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is MISSING:
+            tokens = float(self.burst)
+        else:
+            tokens, last = bucket
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1.0:
+            self.throttled += 1
+            self._buckets.set(key, (tokens, now), ttl=(self.burst - tokens) / self.rate)
+            return (1.0 - tokens) / self.rate
+        tokens -= 1.0
+        self._buckets.set(key, (tokens, now), ttl=(self.burst - tokens) / self.rate)
+        self.allowed += 1
+        return 0.0
+
+
+class AdmissionController:
+    def __init__(self, classes: Dict[str, RouteClass], login_throttle: Optional[TokenBucket] = None):
+        self.classes = classes
+        self.login_throttle = login_throttle
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        max_queue = settings.ADMISSION_MAX_QUEUE
+        classes = {
+            "auth": RouteClass("auth", settings.ADMISSION_AUTH_LIMIT, settings.ADMISSION_AUTH_QUEUE_MS, max_queue),
+            "item_write": RouteClass(
+                "item_write", settings.ADMISSION_ITEM_WRITE_LIMIT, settings.ADMISSION_ITEM_WRITE_QUEUE_MS, max_queue,
+            ),
+            "item_read": RouteClass(
+                "item_read", settings.ADMISSION_ITEM_READ_LIMIT, settings.ADMISSION_ITEM_READ_QUEUE_MS, max_queue,
+            ),
+            "health": RouteClass("health", settings.ADMISSION_HEALTH_LIMIT, settings.ADMISSION_HEALTH_QUEUE_MS, max_queue),
+        }
+        throttle = None
+        if settings.LOGIN_RATE_PER_MINUTE > 0:
+            throttle = TokenBucket(settings.LOGIN_RATE_PER_MINUTE, settings.LOGIN_BURST, settings.LOGIN_THROTTLE_MAX_IPS)
+        return cls(classes, throttle)
+
+    def classify(self, method: str, path: str) -> Optional[RouteClass]:
+        if path.startswith("/auth/"):
+            name = "auth"
+        elif path == "/items" or path.startswith("/items/"):
+            name = "item_write" if method in WRITE_METHODS else "item_read"
+        elif path in ("/", "/metrics"):
+            name = "health"
+        else:
+            return None
+        route_class = self.classes[name]
+        return route_class if route_class.limit > 0 else None
+
+    def stats(self) -> Dict[str, int]:
+        out = {
+            f"{name}_{key}": value
+            for name, route_class in self.classes.items()
+            for key, value in route_class.stats().items()
+        }
+        if self.login_throttle is not None:
+            out["login_allowed"] = self.login_throttle.allowed
+            out["login_throttled"] = self.login_throttle.throttled
+        return out
+
+
+def client_address(scope, trusted_proxies: FrozenSet[str] = frozenset()) -> str:
+    """
+    The address to throttle: the TCP peer, unless it is a trusted proxy.
+    Then X-Forwarded-For is walked from the right, past the trusted hops;
+    entries left of the first untrusted one are client-supplied.
+    """
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if address not in trusted_proxies:
+        return address
+    for name, value in scope["headers"]:
+        if name == b"x-forwarded-for":
+            for hop in reversed(value.decode("latin-1").split(",")):
+                address = hop.strip()
+                if address not in trusted_proxies:
+                    break
+            break
+    return address
+
+
+def _retry_after(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware in front of the app; see the module docstring."""
+
+    def __init__(self, app, controller: AdmissionController, trusted_proxies: FrozenSet[str] = frozenset()):
+        self.app = app
+        self.controller = controller
+        self.trusted_proxies = frozenset(trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        throttle = self.controller.login_throttle
+        if throttle is not None and method == "POST" and path == LOGIN_PATH:
+            wait = throttle.take(client_address(scope, self.trusted_proxies))
+            if wait:
+                response = JSONResponse(
+                    {"detail": "Too many login attempts"},
+                    status_code=429,
+                    headers={"Retry-After": _retry_after(wait)},
+                )
+                await response(scope, receive, send)
+                return
+
+        route_class = self.controller.classify(method, path)
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await route_class.acquire():
+            response = JSONResponse(
+                {"detail": "Server is busy, try again later"},
+                status_code=503,
+                headers={"Retry-After": _retry_after(route_class.queue_timeout)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.release()
+
+
+admission_controller = AdmissionController.from_settings()
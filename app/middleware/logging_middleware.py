@@ -1,52 +1,133 @@
 # app/middleware/logging_middleware.py
-from fastapi import Request
-from starlette.responses import Response
-from sqlalchemy.orm import Session
+"""
+Access and session logging as a pure ASGI middleware.
+
+The status is taken from ``http.response.start`` and the body is passed
+through untouched, so streaming responses stream. The log work (session
+lookup, access log record, session log line) runs once the response has
+been sent. Paths in LOG_SKIP_PATHS get no logging at all; LOG_SAMPLE_RATES
+logs only a fraction of the requests to the given route templates.
+Exceptions from the app are logged (as a 500 unless the response had
+started) and re-raised for the server to handle.
+"""
+import random
 import traceback
-from app.database import SessionLocal
-from app.models.logs import AccessLog, UserSession
-from app.utils.logging_utils import get_client_ip, append_text_log, append_xlsx_log
-from datetime import datetime
-
-async def session_logging_middleware(request: Request, call_next):
-    db: Session = SessionLocal()
-    try:
-        response: Response = await call_next(request)
-        status = response.status_code
-
-        session_id = request.cookies.get("session_id")
-        ip = get_client_ip(request)
-        ua = request.headers.get("user-agent", "unknown")
-
-        session_row = None
-        if session_id:
-            session_row = db.query(UserSession).filter(UserSession.id == session_id, UserSession.active == True).first()
-
-        access = AccessLog(
-            session_id = session_id if session_row else None,
-            user_id = session_row.user_id if session_row else None,
-            path = request.url.path,
-            method = request.method,
-            status_code = status,
-            ip = ip,
-            user_agent = ua,
-            extra = None
-        )
-        db.add(access)
-        db.commit()
-
-        if session_row:
-            ts = datetime.utcnow().isoformat()
-            line = f"[{ts}] {request.method} {request.url.path} status={status} ip={ip} ua={ua}"
-            try:
-                append_text_log(session_id, line)
-                append_xlsx_log(session_id, [ts, request.method, request.url.path, status, ip, ua, ""])
-            except Exception:
-                traceback.print_exc()
-
-        return response
-    except Exception:
-        traceback.print_exc()
-        return Response("Internal server error in logging middleware", status_code=500)
-    finally:
-        db.close()
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from starlette.requests import Request
+
+from app.database import UnitOfWork
+from app.services.access_log_writer import access_log_writer
+from app.services.session_log_writer import session_log_writer
+from app.services.session_service import lookup_active_session
+from app.utils.logging_utils import get_client_ip
+from app.utils.metrics import span
+
+
+def parse_skip_paths(value: str) -> Tuple[frozenset, Tuple[str, ...]]:
+    """"/a, /b/*" -> exact paths and prefixes (entries ending in "*")."""
+    entries = [p.strip() for p in value.split(",") if p.strip()]
+    return (
+        frozenset(p for p in entries if not p.endswith("*")),
+        tuple(p[:-1] for p in entries if p.endswith("*")),
+    )
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """"/items/{item_id}=0.1, /items/=0.5" -> {route template: rate}."""
+    rates = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        route, sep, rate = entry.rpartition("=")
+        if not sep or not 0.0 <= float(rate) <= 1.0:
+            raise ValueError(f"Invalid LOG_SAMPLE_RATES entry: {entry.strip()!r}")
+        rates[route.strip()] = float(rate)
+    return rates
+
+
+class SessionLoggingMiddleware:
+    def __init__(
+        self,
+        app,
+        skip_paths: Iterable[str] = (),
+        skip_prefixes: Iterable[str] = (),
+        sample_rates: Optional[Dict[str, float]] = None,
+    ):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+        self.skip_prefixes = tuple(skip_prefixes)
+        self.sample_rates = sample_rates or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        if path in self.skip_paths or (self.skip_prefixes and path.startswith(self.skip_prefixes)):
+            await self.app(scope, receive, send)
+            return
+
+        # one lazily opened session for the whole request, see get_db
+        uow = scope.setdefault("state", {})["uow"] = UnitOfWork()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            # unless the response had started, the server answers 500: log
+            # the status it gets, then let the error reach the server
+            await self._log(scope, status, uow)
+            raise
+        else:
+            await self._log(scope, status, uow)
+        finally:
+            await uow.close()
+
+    async def _log(self, scope, status: int, uow: UnitOfWork):
+        # path template, set by the router; keys the traffic rollups and sampling
+        route = getattr(scope.get("route"), "path", None)
+        rate = self.sample_rates.get(route)
+        if rate is not None and random.random() >= rate:
+            return
+        try:
+            request = Request(scope)
+            session_id = request.cookies.get("session_id")
+            ip = get_client_ip(request)
+            ua = request.headers.get("user-agent", "unknown")
+
+            # cached; only touches the database on a miss
+            with span("session_lookup"):
+                user_id = await lookup_active_session(session_id, uow) if session_id else None
+
+            with span("access_log"):
+                await access_log_writer.submit({
+                    "session_id": session_id if user_id else None,
+                    "user_id": user_id,
+                    "path": scope["path"],
+                    "route": route,
+                    "method": scope["method"],
+                    "status_code": status,
+                    "ip": ip,
+                    "user_agent": ua,
+                    "timestamp": datetime.now(timezone.utc),
+                    "extra": None,
+                })
+
+            if user_id:
+                ts = datetime.utcnow().isoformat()
+                line = f"[{ts}] {scope['method']} {scope['path']} status={status} ip={ip} ua={ua}"
+                with span("session_log"):
+                    # memory only; written out by the writer's flush task
+                    session_log_writer.append(session_id, line, [ts, scope["method"], scope["path"], status, ip, ua, ""])
+        except Exception:
+            # the response is already out; a logging failure must not turn it into an error
+            traceback.print_exc()
+
@@ -1,3 +1,6 @@
 # app/models/__init__.py
 from app.models.user import User  # noqa: F401
-from app.models.item import Item  # noqa: F401
+from app.models.item import Item, ItemVersion  # noqa: F401
+from app.models.logs import UserSession, AccessLog  # noqa: F401
+from app.models.invalidation import CacheInvalidation  # noqa: F401
+from app.models.rollup import TrafficRollup, UserSessionStats  # noqa: F401
@@ -0,0 +1,19 @@
+# app/models/invalidation.py
+from sqlalchemy import Column, Float, Index, Integer, String
+from app.database import Base
+
+class CacheInvalidation(Base):
+    """Change feed read by every worker's invalidation bus; rows are short-lived."""
+    __tablename__ = "cache_invalidations"
+    # AUTOINCREMENT: ids are never reused, even once every row is pruned;
+    # workers read the feed by id > last seen
+    __table_args__ = (
+        Index("ix_cache_invalidations_created_at", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    channel = Column(String(32), nullable=False)
+    key = Column(String(255), nullable=False)
+    origin = Column(String(32), nullable=False)
+    # unix time, used for the propagation lag metric and for pruning
+    created_at = Column(Float, nullable=False)
@@ -1,11 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
-from app.database import Base
+from app.database import Base, register_ddl
 
 
 class Item(Base):
     __tablename__ = "items"
+    # keyset pagination walks (owner_id, id)
+    __table_args__ = (Index("ix_items_owner_id_id", "owner_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -13,3 +15,54 @@ class Item(Base):
 
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="items")
+
+
+class ItemVersion(Base):
+    """Per-owner version of the items, bumped in the transaction of every write; keys ETags."""
+    __tablename__ = "item_versions"
+
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# Full-text index over title and description (SQLite FTS5). It is an
+# external-content table reading from a view, so it stores no copy of the
+# text; the view adds an "o<owner_id>" token so that a search is scoped to
+# one owner inside the index, and the prefix indexes keep short prefix
+# queries from expanding to thousands of terms. Triggers keep it in sync
+# with every write.
+register_ddl(
+    "items_fts_source",
+    "CREATE VIEW items_fts_source AS SELECT id, title, description, 'o' || owner_id AS owner FROM items",
+)
+register_ddl(
+    "items_fts",
+    "CREATE VIRTUAL TABLE items_fts USING fts5("
+    "title, description, owner, content='items_fts_source', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    populate=(
+        # title matches count double; the owner token does not score
+        "INSERT INTO items_fts(items_fts, rank) VALUES('rank', 'bm25(10.0, 5.0, 0.0)')",
+        "INSERT INTO items_fts(items_fts) VALUES('rebuild')",
+    ),
+)
+register_ddl(
+    "items_fts_ai",
+    "CREATE TRIGGER items_fts_ai AFTER INSERT ON items BEGIN "
+    "INSERT INTO items_fts(rowid, title, description, owner) "
+    "VALUES (new.id, new.title, new.description, 'o' || new.owner_id); END",
+)
+register_ddl(
+    "items_fts_ad",
+    "CREATE TRIGGER items_fts_ad AFTER DELETE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description, owner) "
+    "VALUES ('delete', old.id, old.title, old.description, 'o' || old.owner_id); END",
+)
+register_ddl(
+    "items_fts_au",
+    "CREATE TRIGGER items_fts_au AFTER UPDATE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description, owner) "
+    "VALUES ('delete', old.id, old.title, old.description, 'o' || old.owner_id); "
+    "INSERT INTO items_fts(rowid, title, description, owner) "
+    "VALUES (new.id, new.title, new.description, 'o' || new.owner_id); END",
+)
@@ -1,5 +1,5 @@
 # app/models/logs.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -18,6 +18,12 @@ class UserSession(Base):
 
 class AccessLog(Base):
     __tablename__ = "access_logs"
+    # activity lookups filter by session or user within a time range
+    __table_args__ = (
+        Index("ix_access_logs_timestamp", "timestamp"),
+        Index("ix_access_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_access_logs_session_id_timestamp", "session_id", "timestamp"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String(64), ForeignKey("user_sessions.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
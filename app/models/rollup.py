@@ -0,0 +1,29 @@
+# app/models/rollup.py
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from app.database import Base
+
+class TrafficRollup(Base):
+    """
+    Request counts per bucket, route template, method, status and user.
+    Written per minute with each access-log batch; compaction folds old
+    minutes into hours and old hours into days (see rollup_repository).
+    """
+    __tablename__ = "traffic_rollups"
+    # bucket width in seconds: 60, 3600 or 86400
+    granularity = Column(Integer, primary_key=True)
+    # unix time of the bucket start, UTC
+    bucket = Column(Integer, primary_key=True)
+    route = Column(String(200), primary_key=True)
+    method = Column(String(10), primary_key=True)
+    status_code = Column(Integer, primary_key=True)
+    # 0 for requests without an active session
+    user_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class UserSessionStats(Base):
+    """Per-user session counters, kept in step with user_sessions by the session store."""
+    __tablename__ = "user_session_stats"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    active_sessions = Column(Integer, nullable=False, default=0)
+    total_sessions = Column(Integer, nullable=False, default=0)
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
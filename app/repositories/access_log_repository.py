@@ -0,0 +1,188 @@
+# app/repositories/access_log_repository.py
+import gzip
+import json
+import re
+import threading
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, inspect, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine, write_engine
+from app.models.logs import AccessLog
+
+# Day partitions live outside Base.metadata: they come and go at runtime and
+# must not take part in create_all() or the schema fingerprint.
+partition_metadata = MetaData()
+PARTITION_PREFIX = "access_logs_"
+PARTITION_RE = re.compile(r"^access_logs_(\d{8})$")
+CURSOR_RE = re.compile(r"^(\d{8}):(\d+)$")
+# the unpartitioned table holds rows written before partitioning was enabled
+LEGACY_KEY = "00000000"
+
+_partitions: Dict[date, Table] = {}
+_created: set = set()
+_lock = threading.Lock()
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def partition_table(day: date) -> Table:
+    table = _partitions.get(day)
+    if table is None:
+        name = partition_name(day)
+        table = Table(
+            name,
+            partition_metadata,
+            Column("id", Integer, primary_key=True),
+            Column("session_id", String(64)),
+            Column("user_id", Integer),
+            Column("path", String(1000)),
+            Column("method", String(10)),
+            Column("status_code", Integer),
+            Column("ip", String(50)),
+            Column("user_agent", String(400)),
+            Column("timestamp", DateTime(timezone=True)),
+            Column("extra", Text),
+            Index(f"ix_{name}_timestamp", "timestamp"),
+            Index(f"ix_{name}_user_id_timestamp", "user_id", "timestamp"),
+            Index(f"ix_{name}_session_id_timestamp", "session_id", "timestamp"),
+            extend_existing=True,
+        )
+        _partitions[day] = table
+    return table
+
+
+def ensure_partition(day: date) -> Table:
+    """Create the day's table on first use; this is the rollover."""
+    table = partition_table(day)
+    if day not in _created:
+        with _lock:
+            if day not in _created:
+                table.create(bind=write_engine, checkfirst=True)
+                _created.add(day)
+    return table
+
+
+def list_partitions(bind=None) -> List[date]:
+    # a read: under the performance profile the writer is for writes only
+    days = []
+    for name in inspect(engine if bind is None else bind).get_table_names():
+        match = PARTITION_RE.match(name)
+        if match:
+            days.append(datetime.strptime(match.group(1), "%Y%m%d").date())
+    return sorted(days)
+
+
+def _utc_naive(value: datetime) -> datetime:
+    # SQLite stores DateTime without an offset, so compare in naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class AccessLogRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def insert_many(self, rows: List[dict]):
+        """Bulk insert, routed to each row's day partition when partitioning is on."""
+        if not settings.ACCESS_LOG_PARTITIONED:
+            self.db.execute(insert(AccessLog), rows)
+            return
+        by_day: Dict[date, List[dict]] = {}
+        for row in rows:
+            ts = row["timestamp"]
+            day = (ts.astimezone(timezone.utc) if ts.tzinfo else ts).date()
+            by_day.setdefault(day, []).append(row)
+        # create every day's table before the first insert: the DDL runs on
+        # its own connection and would wait on this session's write lock
+        tables = {day: ensure_partition(day) for day in by_day}
+        for day, day_rows in by_day.items():
+            self.db.execute(insert(tables[day]), day_rows)
+
+    def activity_for_session(
+        self,
+        session_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+        after: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Page through a session's requests in time order.
+
+        Only partitions overlapping [since, until) are queried. The cursor is
+        ``<partition day>:<row id>``; it is returned when more rows may follow.
+        Raises ValueError for a malformed cursor.
+        """
+        after_key, after_id = LEGACY_KEY, 0
+        if after:
+            match = CURSOR_RE.match(after)
+            if match is None:
+                raise ValueError(f"Invalid activity cursor: {after!r}")
+            after_key, after_id = match.group(1), int(match.group(2))
+
+        sources: List[Tuple[str, Table]] = [(LEGACY_KEY, AccessLog.__table__)]
+        if settings.ACCESS_LOG_PARTITIONED:
+            # partitions are UTC days
+            first = _utc_naive(since).date() if since else None
+            last = _utc_naive(until).date() if until else None
+            for day in list_partitions(self.db.connection()):
+                if (first and day < first) or (last and day > last):
+                    continue
+                sources.append((f"{day:%Y%m%d}", partition_table(day)))
+
+        rows: List[dict] = []
+        for key, table in sources:
+            if key < after_key:
+                continue
+            stmt = select(table).where(table.c.session_id == session_id)
+            if key == after_key:
+                stmt = stmt.where(table.c.id > after_id)
+            if since:
+                stmt = stmt.where(table.c.timestamp >= _utc_naive(since))
+            if until:
+                stmt = stmt.where(table.c.timestamp < _utc_naive(until))
+            stmt = stmt.order_by(table.c.id).limit(limit - len(rows))
+            for row in self.db.execute(stmt).mappings():
+                rows.append({**row, "_cursor": f"{key}:{row['id']}"})
+            if len(rows) >= limit:
+                return rows, rows[-1]["_cursor"]
+        return rows, None
+
+
+def apply_retention(retention_days: int, archive_dir: Optional[str] = None, today: Optional[date] = None) -> List[str]:
+    """
+    Drop day partitions older than ``retention_days``, archiving each one to a
+    gzip-compressed NDJSON file first when ``archive_dir`` is set.
+    Returns the names of the dropped tables.
+    """
+    if retention_days <= 0:
+        return []
+    cutoff = (today or datetime.now(timezone.utc).date()) - timedelta(days=retention_days)
+    dropped = []
+    for day in list_partitions():
+        if day >= cutoff:
+            continue
+        table = partition_table(day)
+        if archive_dir:
+            target = Path(archive_dir)
+            target.mkdir(parents=True, exist_ok=True)
+            path = target / f"{table.name}.ndjson.gz"
+            with write_engine.connect() as conn, gzip.open(path, "wt", encoding="utf-8") as fh:
+                result = conn.execution_options(stream_results=True).execute(select(table).order_by(table.c.id))
+                for row in result.mappings():
+                    fh.write(json.dumps(dict(row), default=str) + "\n")
+        with _lock:
+            table.drop(bind=write_engine, checkfirst=True)
+            _created.discard(day)
+            _partitions.pop(day, None)
+            partition_metadata.remove(table)
+        dropped.append(table.name)
+    return dropped
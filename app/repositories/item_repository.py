@@ -1,10 +1,32 @@
 # app/repositories/item_repository.py
-from typing import List, Optional
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
+from sqlalchemy import Select, insert, select, update
 from sqlalchemy.orm import Session
 
-from app.models.item import Item
-from app.schemas.item import ItemCreate
+from app.database import run_db
+from app.models.item import Item, ItemVersion
+from app.repositories import item_search
+from app.schemas.item import ItemCreate, ItemRow
+
+
+def _bump_version(db: Session, owner_id: int):
+    # inside the write's transaction: every worker reads the new version
+    # together with the new rows, and no reader sees one without the other
+    table = ItemVersion.__table__
+    if not db.execute(update(table).where(table.c.owner_id == owner_id).values(version=table.c.version + 1)).rowcount:
+        db.execute(insert(table).values(owner_id=owner_id, version=1))
+
+
+# ItemRead's fields, in its field order, for the *_rows reads below
+ROW_COLUMNS = (Item.title, Item.description, Item.id, Item.owner_id)
+
+
+def _row_select(owner_id: int, after: Optional[int] = None) -> Select:
+    stmt = select(*ROW_COLUMNS).where(Item.owner_id == owner_id)
+    if after is not None:
+        stmt = stmt.where(Item.id > after)
+    return stmt.order_by(Item.id)
 
 
 class ItemRepository:
@@ -18,12 +40,74 @@ class ItemRepository:
             owner_id=owner_id,
         )
         self.db.add(item)
+        self.db.flush()
+        _bump_version(self.db, owner_id)
         self.db.commit()
         self.db.refresh(item)
         return item
 
-    def list_for_user(self, owner_id: int) -> List[Item]:
-        return self.db.query(Item).filter(Item.owner_id == owner_id).all()
+    def bulk_create_for_user(self, owner_id: int, items_in: List[ItemCreate], chunk_size: int = 500) -> List[int]:
+        """Insert all items in one transaction, one multi-row INSERT per chunk."""
+        stmt = insert(Item).returning(Item.id, sort_by_parameter_order=True)
+        ids: List[int] = []
+        try:
+            for start in range(0, len(items_in), chunk_size):
+                rows = [
+                    {"title": i.title, "description": i.description, "owner_id": owner_id}
+                    for i in items_in[start:start + chunk_size]
+                ]
+                ids.extend(self.db.scalars(stmt, rows).all())
+            _bump_version(self.db, owner_id)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return ids
+
+    def version_for_user(self, owner_id: int) -> int:
+        """The owner's items version; 0 until their first write."""
+        version = self.db.scalar(select(ItemVersion.version).where(ItemVersion.owner_id == owner_id))
+        return version or 0
+
+    def list_for_user(
+        self,
+        owner_id: int,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[Item]:
+        # keyset pagination on id, served by ix_items_owner_id_id
+        query = self.db.query(Item).filter(Item.owner_id == owner_id)
+        if after is not None:
+            query = query.filter(Item.id > after)
+        query = query.order_by(Item.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def list_rows_for_user(
+        self,
+        owner_id: int,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[ItemRow]:
+        """list_for_user as plain dicts: no ORM identity map, no model validation."""
+        stmt = _row_select(owner_id, after)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return [row._asdict() for row in self.db.execute(stmt)]
+
+    @staticmethod
+    def stream_stmt(owner_id: int, after: Optional[int] = None, batch_size: int = 500) -> Select:
+        return _row_select(owner_id, after).execution_options(stream_results=True, yield_per=batch_size)
+
+    def iter_rows_for_user(
+        self,
+        owner_id: int,
+        after: Optional[int] = None,
+        batch_size: int = 500,
+    ) -> Iterator[ItemRow]:
+        for row in self.db.execute(self.stream_stmt(owner_id, after, batch_size)):
+            yield row._asdict()
 
     def get_by_id_and_owner(self, item_id: int, owner_id: int) -> Optional[Item]:
         return (
@@ -31,3 +115,67 @@ class ItemRepository:
             .filter(Item.id == item_id, Item.owner_id == owner_id)
             .first()
         )
+
+    def search_rows_for_user(
+        self,
+        owner_id: int,
+        q: str,
+        limit: int = 20,
+        after: Optional[str] = None,
+    ) -> Tuple[List[ItemRow], Optional[str]]:
+        """Full-text search, best match first; see app.repositories.item_search."""
+        return item_search.search(self.db, owner_id, q, limit, after)
+
+    def get_row_by_id_and_owner(self, item_id: int, owner_id: int) -> Optional[ItemRow]:
+        row = self.db.execute(select(*ROW_COLUMNS).where(Item.id == item_id, Item.owner_id == owner_id)).first()
+        return row._asdict() if row is not None else None
+
+
+class AsyncItemRepository:
+    """
+    Awaitable ItemRepository. Works on an AsyncSession (queries go through the
+    async driver) or on a plain Session (queries run in the threadpool).
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    async def create_for_user(self, owner_id: int, item_in: ItemCreate) -> Item:
+        return await run_db(self.db, lambda s: ItemRepository(s).create_for_user(owner_id, item_in))
+
+    async def bulk_create_for_user(self, owner_id: int, items_in: List[ItemCreate], chunk_size: int = 500) -> List[int]:
+        return await run_db(self.db, lambda s: ItemRepository(s).bulk_create_for_user(owner_id, items_in, chunk_size))
+
+    async def version_for_user(self, owner_id: int) -> int:
+        return await run_db(self.db, lambda s: ItemRepository(s).version_for_user(owner_id))
+
+    async def list_rows_for_user(
+        self,
+        owner_id: int,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[ItemRow]:
+        return await run_db(self.db, lambda s: ItemRepository(s).list_rows_for_user(owner_id, limit, after))
+
+    async def iter_rows_for_user(
+        self,
+        owner_id: int,
+        after: Optional[int] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[ItemRow]:
+        # AsyncSession only: a sync Session is streamed by ItemRepository.iter_rows_for_user
+        result = await self.db.stream(ItemRepository.stream_stmt(owner_id, after, batch_size))
+        async for row in result:
+            yield row._asdict()
+
+    async def search_rows_for_user(
+        self,
+        owner_id: int,
+        q: str,
+        limit: int = 20,
+        after: Optional[str] = None,
+    ) -> Tuple[List[ItemRow], Optional[str]]:
+        return await run_db(self.db, lambda s: ItemRepository(s).search_rows_for_user(owner_id, q, limit, after))
+
+    async def get_row_by_id_and_owner(self, item_id: int, owner_id: int) -> Optional[ItemRow]:
+        return await run_db(self.db, lambda s: ItemRepository(s).get_row_by_id_and_owner(item_id, owner_id))
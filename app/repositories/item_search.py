@@ -0,0 +1,110 @@
+# app/repositories/item_search.py
+"""
+Full-text search over an owner's items.
+
+Matching runs in the ``items_fts`` FTS5 index (see app.models.item), which
+carries an ``o<owner_id>`` token per row, so a query only walks the owner's
+postings. Results are ordered by FTS5's ``rank`` (the bm25 weights set on
+the table) and keyset-paginated on (rank, rowid): each page resumes after
+the previous one in SQL instead of re-ranking every match. The cursor is
+``<score>:<id>`` with score = -rank.
+
+bm25 scores depend on the statistics of the whole index, every owner's
+rows included, so any insert or update between two page requests can
+shift ranks and make the next page skip or repeat results. Cursors are
+only exact while the index doesn't change.
+"""
+import math
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.orm import Session
+
+from app.database import IS_SQLITE
+from app.models.item import Item
+from app.repositories import item_repository
+from app.schemas.item import ItemRow
+
+# the same split as FTS5's unicode61 tokenizer: runs of letters and digits
+_TOKEN = re.compile(r"[^\W_]+")
+
+_RANKED = (
+    "SELECT i.title, i.description, i.id, i.owner_id, f.rank AS rank FROM items_fts AS f "
+    "JOIN items AS i ON i.id = f.rowid WHERE items_fts MATCH :match {keyset}"
+    "ORDER BY f.rank, f.rowid LIMIT :limit"
+)
+_FIRST_PAGE = text(_RANKED.format(keyset=""))
+_NEXT_PAGE = text(_RANKED.format(keyset="AND (f.rank > :rank OR (f.rank = :rank AND f.rowid > :after_id)) "))
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    if value.isascii():
+        return _TOKEN.findall(value.lower())
+    folded = unicodedata.normalize("NFKD", value.casefold())
+    return _TOKEN.findall("".join(c for c in folded if not unicodedata.combining(c)))
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def fts_match(owner_id: int, terms: List[str]) -> str:
+    """
+    FTS5 query for items of ``owner_id`` containing every term in title or
+    description. The last term also matches as a prefix (search as you type).
+    """
+    words = [_quote(t) for t in terms[:-1]] + [_quote(terms[-1]) + "*"]
+    return f"owner:o{owner_id} AND {{title description}}: ({' '.join(words)})"
+
+
+def _parse_cursor(after: Optional[str]) -> Optional[Tuple[float, int]]:
+    if not after:
+        return None
+    raw_score, _, raw_id = after.rpartition(":")
+    score = float(raw_score)
+    if not math.isfinite(score):
+        raise ValueError(f"Invalid search cursor: {after!r}")
+    return score, int(raw_id)
+
+
+def search(db: Session, owner_id: int, q: str, limit: int = 20, after: Optional[str] = None) -> Tuple[List[ItemRow], Optional[str]]:
+    """Raises ValueError for a malformed cursor."""
+    terms = tokenize(q)
+    cursor = _parse_cursor(after)
+    if not terms:
+        return [], None
+    if not IS_SQLITE:
+        return _search_like(db, owner_id, terms, limit, cursor)
+
+    params = {"match": fts_match(owner_id, terms), "limit": limit}
+    if cursor is None:
+        result = db.execute(_FIRST_PAGE, params)
+    else:
+        score, after_id = cursor
+        result = db.execute(_NEXT_PAGE, {**params, "rank": -score, "after_id": after_id})
+    page = result.all()
+    rows = [{"title": r.title, "description": r.description, "id": r.id, "owner_id": r.owner_id} for r in page]
+    next_after = f"{-page[-1].rank!r}:{page[-1].id}" if len(page) == limit else None
+    return rows, next_after
+
+
+def _search_like(db: Session, owner_id: int, terms: List[str], limit: int, cursor: Optional[Tuple[float, int]]) -> Tuple[List[ItemRow], Optional[str]]:
+    # databases without FTS5: substring match on every word, in id order
+    after_id = cursor[1] if cursor else 0
+    stmt = select(*item_repository.ROW_COLUMNS).where(Item.owner_id == owner_id, Item.id > after_id)
+    for term in terms:
+        pattern = f"%{term}%"
+        stmt = stmt.where(or_(Item.title.ilike(pattern), Item.description.ilike(pattern)))
+    rows = [row._asdict() for row in db.execute(stmt.order_by(Item.id).limit(limit))]
+    return rows, (f"0.0:{rows[-1]['id']}" if len(rows) == limit else None)
+
+
+def rebuild_search_index(bind) -> None:
+    """Re-index every item, e.g. after loading rows with the triggers missing."""
+    with bind.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO items_fts(items_fts) VALUES('rebuild')")
+        conn.exec_driver_sql("INSERT INTO items_fts(items_fts) VALUES('optimize')")
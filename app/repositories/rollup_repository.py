@@ -0,0 +1,193 @@
+# app/repositories/rollup_repository.py
+"""
+Traffic and session rollups behind /admin/stats.
+
+Each access-log batch adds its requests to per-minute buckets of
+``traffic_rollups`` in the same transaction. ``compact`` later moves
+minutes older than the minute retention into hour buckets, and hours into
+days, so every request is counted in exactly one bucket. Reads sum the
+buckets in range across all three widths: their cost depends on the number
+of buckets and distinct keys, not on how many requests were logged.
+"""
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Connection, case, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.logs import UserSession
+from app.models.rollup import TrafficRollup, UserSessionStats
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+GRANULARITIES = {"minute": MINUTE, "hour": HOUR, "day": DAY}
+UNMATCHED_ROUTE = "unmatched"
+TRAFFIC_KEY = ("granularity", "bucket", "route", "method", "status_code", "user_id")
+GROUP_BY = {"route": "route", "method": "method", "status": "status_code", "user": "user_id"}
+
+
+def _epoch(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp())
+
+
+def _upsert(db: Union[Session, Connection], model, rows: List[Dict[str, Any]], key: Sequence[str], add: Sequence[str], replace: Sequence[str] = ()):
+    """Insert rows, or add the ``add`` columns to (and overwrite ``replace`` on) existing ones."""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = (db.get_bind() if isinstance(db, Session) else db).dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        values = {c: table.c[c] + stmt.excluded[c] for c in add}
+        values.update({c: func.coalesce(stmt.excluded[c], table.c[c]) for c in replace})
+        db.execute(stmt.on_conflict_do_update(index_elements=list(key), set_=values), rows)
+        return
+    # no portable upsert: update, then insert what was missing
+    for row in rows:
+        match = [table.c[c] == row[c] for c in key]
+        values = {c: table.c[c] + row[c] for c in add}
+        values.update({c: row[c] for c in replace if row[c] is not None})
+        if not db.execute(update(table).where(*match).values(values)).rowcount:
+            db.execute(table.insert(), [row])
+
+
+class RollupRepository:
+    # the session store writes through a Connection, everything else a Session
+    def __init__(self, db: Union[Session, Connection]):
+        self.db = db
+
+    # -- writes --------------------------------------------------------------
+
+    def add_requests(self, records: Iterable[Dict[str, Any]]):
+        """Count access-log records into minute buckets (call inside the batch's transaction)."""
+        counts: Counter = Counter()
+        for r in records:
+            bucket = _epoch(r["timestamp"]) // MINUTE * MINUTE
+            counts[(bucket, r.get("route") or UNMATCHED_ROUTE, r["method"], r["status_code"], r["user_id"] or 0)] += 1
+        rows = [
+            {"granularity": MINUTE, "bucket": bucket, "route": route, "method": method,
+             "status_code": status_code, "user_id": user_id, "count": n}
+            for (bucket, route, method, status_code, user_id), n in counts.items()
+        ]
+        _upsert(self.db, TrafficRollup, rows, TRAFFIC_KEY, ("count",))
+
+    def adjust_sessions(self, deltas: Dict[int, Tuple[int, int, Optional[datetime]]]):
+        """Apply {user_id: (active delta, total delta, last login or None)}."""
+        rows = [
+            {"user_id": user_id, "active_sessions": active, "total_sessions": total, "last_login_at": last_login}
+            for user_id, (active, total, last_login) in deltas.items() if active or total
+        ]
+        _upsert(self.db, UserSessionStats, rows, ("user_id",), ("active_sessions", "total_sessions"), ("last_login_at",))
+
+    def compact(self, minute_retention: float, hour_retention: float, day_retention: float = 0, now: Optional[float] = None) -> int:
+        """
+        Fold minute buckets older than ``minute_retention`` seconds into hours
+        and hours older than ``hour_retention`` into days, one coarse bucket
+        per transaction; drop days older than ``day_retention`` (0 = keep).
+        Rows are claimed with DELETE ... RETURNING, so workers compacting at
+        the same time never count a row twice. Returns the rows folded.
+        """
+        now = time.time() if now is None else now
+        table = TrafficRollup.__table__
+        folded = 0
+        for fine, coarse, retention in ((MINUTE, HOUR, minute_retention), (HOUR, DAY, hour_retention)):
+            cutoff = int(now - retention) // coarse * coarse
+            while True:
+                first = self.db.execute(
+                    select(func.min(table.c.bucket)).where(table.c.granularity == fine, table.c.bucket < cutoff)
+                ).scalar()
+                if first is None:
+                    break
+                start = first // coarse * coarse
+                claimed = self.db.execute(
+                    delete(table)
+                    .where(table.c.granularity == fine, table.c.bucket >= start, table.c.bucket < start + coarse)
+                    .returning(table.c.route, table.c.method, table.c.status_code, table.c.user_id, table.c.count)
+                ).all()
+                counts: Counter = Counter()
+                for row in claimed:
+                    counts[(row.route, row.method, row.status_code, row.user_id)] += row.count
+                _upsert(self.db, TrafficRollup, [
+                    {"granularity": coarse, "bucket": start, "route": route, "method": method,
+                     "status_code": status_code, "user_id": user_id, "count": n}
+                    for (route, method, status_code, user_id), n in counts.items()
+                ], TRAFFIC_KEY, ("count",))
+                self.db.commit()
+                folded += len(claimed)
+        if day_retention:
+            cutoff = int(now - day_retention) // DAY * DAY
+            self.db.execute(delete(table).where(table.c.granularity == DAY, table.c.bucket < cutoff))
+            self.db.commit()
+        return folded
+
+    def rebuild_session_stats(self) -> int:
+        """Recompute user_session_stats from user_sessions, e.g. after enabling rollups."""
+        rows = self.db.execute(
+            select(
+                UserSession.user_id,
+                func.sum(case((UserSession.active == True, 1), else_=0)),
+                func.count(),
+                func.max(UserSession.created_at),
+            ).group_by(UserSession.user_id)
+        ).all()
+        self.db.execute(delete(UserSessionStats))
+        if rows:
+            self.db.execute(UserSessionStats.__table__.insert(), [
+                {"user_id": user_id, "active_sessions": active or 0, "total_sessions": total, "last_login_at": last}
+                for user_id, active, total, last in rows
+            ])
+        self.db.commit()
+        return len(rows)
+
+    # -- reads ---------------------------------------------------------------
+
+    def traffic(
+        self,
+        granularity: int,
+        since: int,
+        until: int,
+        group_by: Sequence[str] = ("route", "method", "status"),
+        route: Optional[str] = None,
+        method: Optional[str] = None,
+        status_code: Optional[int] = None,
+        user_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Request counts per ``granularity`` bucket starting in [since, until).
+        Rows already compacted to a coarser width stay whole, reported at
+        their own start (a multiple of every finer width).
+        """
+        table = TrafficRollup.__table__
+        bucket = table.c.bucket - table.c.bucket % granularity
+        columns = [table.c[GROUP_BY[g]] for g in group_by]
+        stmt = (
+            select(bucket.label("bucket"), *columns, func.sum(table.c.count).label("count"))
+            .where(
+                table.c.granularity.in_(list(GRANULARITIES.values())),
+                table.c.bucket >= since,
+                table.c.bucket < until,
+            )
+            .group_by(bucket, *columns)
+            .order_by(bucket, *columns)
+        )
+        for column, value in (("route", route), ("method", method), ("status_code", status_code), ("user_id", user_id)):
+            if value is not None:
+                stmt = stmt.where(table.c[column] == value)
+        return [
+            {**row._asdict(), "bucket": datetime.fromtimestamp(row.bucket, timezone.utc)}
+            for row in self.db.execute(stmt)
+        ]
+
+    def session_stats(self, user_id: Optional[int] = None, limit: int = 100) -> List[UserSessionStats]:
+        stmt = select(UserSessionStats)
+        if user_id is not None:
+            stmt = stmt.where(UserSessionStats.user_id == user_id)
+        stmt = stmt.order_by(UserSessionStats.active_sessions.desc(), UserSessionStats.user_id).limit(limit)
+        return list(self.db.scalars(stmt))
@@ -3,10 +3,33 @@ from typing import Optional
 
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.database import run_db
 from app.models.user import User
-from app.schemas.auth import UserCreate
+from app.schemas.auth import UserCreate, UserRead
+from app.utils.cache import TTLCache
+from app.services.invalidation_bus import invalidation_bus
 from app.utils.hashing import hash_password
 
+# username -> UserRead, read by get_current_user. Every write below goes
+# through this repository and invalidates the affected entries, here and,
+# through the invalidation bus, on the other workers.
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+
+def _principal_changed_elsewhere(username: str):
+    # None (not an eviction) makes get_current_user read the database even
+    # when the token embeds claims, so a deactivation elsewhere is honoured
+    principal_cache.set(username, None)
+
+
+invalidation_bus.subscribe("principal", _principal_changed_elsewhere)
+
+
+def _invalidate_principal(username: str):
+    principal_cache.invalidate(username)
+    invalidation_bus.publish("principal", username)
+
 
 class UserRepository:
     def __init__(self, db: Session):
@@ -21,14 +44,59 @@ class UserRepository:
     def get_by_id(self, user_id: int) -> Optional[User]:
         return self.db.query(User).filter(User.id == user_id).first()
 
-    def create(self, user_in: UserCreate) -> User:
+    def create(self, user_in: UserCreate, hashed_password: Optional[str] = None) -> User:
         user = User(
             username=user_in.username,
             email=user_in.email,
             full_name=user_in.full_name,
-            hashed_password=hash_password(user_in.password),
+            hashed_password=hashed_password or hash_password(user_in.password),
         )
         self.db.add(user)
         self.db.commit()
         self.db.refresh(user)
+        _invalidate_principal(user.username)
+        return user
+
+    def update(self, user: User, **fields) -> User:
+        old_username = user.username
+        for name, value in fields.items():
+            setattr(user, name, value)
+        self.db.add(user)
+        self.db.commit()
+        self.db.refresh(user)
+        _invalidate_principal(old_username)
+        if user.username != old_username:
+            _invalidate_principal(user.username)
         return user
+
+    def deactivate(self, user: User) -> User:
+        user = self.update(user, is_active=False)
+        # keep the inactive principal cached rather than just evicting it, so
+        # tokens carrying embedded claims are rejected for the cache TTL too
+        principal_cache.set(user.username, UserRead.model_validate(user))
+        return user
+
+
+class AsyncUserRepository:
+    """Awaitable UserRepository, see AsyncItemRepository."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def get_by_username(self, username: str) -> Optional[User]:
+        return await run_db(self.db, lambda s: UserRepository(s).get_by_username(username))
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        return await run_db(self.db, lambda s: UserRepository(s).get_by_email(email))
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        return await run_db(self.db, lambda s: UserRepository(s).get_by_id(user_id))
+
+    async def create(self, user_in: UserCreate, hashed_password: Optional[str] = None) -> User:
+        return await run_db(self.db, lambda s: UserRepository(s).create(user_in, hashed_password))
+
+    async def update(self, user: User, **fields) -> User:
+        return await run_db(self.db, lambda s: UserRepository(s).update(user, **fields))
+
+    async def deactivate(self, user: User) -> User:
+        return await run_db(self.db, lambda s: UserRepository(s).deactivate(user))
@@ -0,0 +1,151 @@
+# app/routers/admin_router.py
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from tempfile import SpooledTemporaryFile
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import get_db, run_db
+from app.repositories.rollup_repository import GRANULARITIES, GROUP_BY, RollupRepository
+from app.schemas.auth import UserRead
+from app.schemas.stats import SessionStats, TrafficBucket
+from app.services.auth_service import get_current_admin_user
+from app.services.user_import import FORMATS, UserImporter, iter_stream_batches, shutdown_pool
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# one import per worker; its hashing pool would otherwise compete with more of itself
+_import_lock = asyncio.Lock()
+
+
+class _ImportResponse(StreamingResponse):
+    """Releases the import lock once the response is done, also if the body never started."""
+
+    def __init__(self, content, cleanup, **kwargs):
+        super().__init__(content, **kwargs)
+        self._cleanup = cleanup
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._cleanup()
+
+
+@router.post(
+    "/users/import",
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}, "description": "error/progress/done events, one per line"}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"text/csv": {"schema": {"type": "string"}}, NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+        },
+    },
+)
+async def import_users_route(
+    request: Request,
+    fmt: str = Query(None, alias="format", description="csv or ndjson (default: from Content-Type)"),
+    admin: UserRead = Depends(get_current_admin_user),
+):
+    if fmt is None:
+        fmt = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"format must be one of {', '.join(FORMATS)}")
+    if _import_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="An import is already running")
+    # an uncontended acquire does not yield, so nothing can slip in after the check
+    await _import_lock.acquire()
+
+    def cleanup():
+        spool.close()
+        _import_lock.release()
+
+    # Spool the upload first: while the response streams, the server may
+    # consume receive() itself to watch for disconnects.
+    spool = SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+    except BaseException:
+        cleanup()
+        raise
+    spool.seek(0)
+
+    async def chunks():
+        while chunk := spool.read(64 * 1024):
+            yield chunk
+
+    async def events():
+        # not the login hashing pool: an import must not starve logins
+        pool = ProcessPoolExecutor(max_workers=settings.USER_IMPORT_HASH_WORKERS or os.cpu_count() or 1)
+        try:
+            importer = UserImporter(pool, chunk_size=settings.USER_IMPORT_CHUNK_SIZE)
+            batches = iter_stream_batches(chunks(), fmt, settings.USER_IMPORT_BATCH_SIZE)
+            async for event in importer.run(batches):
+                yield json.dumps(event) + "\n"
+        finally:
+            await shutdown_pool(pool)
+
+    return _ImportResponse(events(), cleanup, media_type=NDJSON_MEDIA_TYPE)
+
+
+def _epoch(ts: datetime) -> int:
+    # naive datetimes are UTC, like every timestamp the app stores
+    return int((ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).timestamp())
+
+
+@router.get("/stats/traffic", response_model=List[TrafficBucket], response_model_exclude_none=True)
+async def traffic_stats_route(
+    granularity: str = Query("minute", description="minute, hour or day"),
+    since: Optional[datetime] = Query(None, description="default: 60 buckets before until"),
+    until: Optional[datetime] = Query(None, description="default: now"),
+    group_by: List[str] = Query(["route", "method", "status"], description="any of route, method, status, user"),
+    route: Optional[str] = Query(None, description="path template, e.g. /items/{item_id}"),
+    method: Optional[str] = None,
+    status_code: Optional[int] = Query(None, alias="status"),
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    admin: UserRead = Depends(get_current_admin_user),
+):
+    """Request counts from the traffic rollups; never reads access_logs."""
+    width = GRANULARITIES.get(granularity)
+    if width is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    unknown = set(group_by) - GROUP_BY.keys()
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot group by {', '.join(sorted(unknown))}")
+
+    end = _epoch(until) if until else int(time.time()) + 1
+    start = _epoch(since) // width * width if since else (end - 1) // width * width - 59 * width
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="until must be after since")
+    if (end - start) // width > settings.ADMIN_STATS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ADMIN_STATS_MAX_BUCKETS} buckets per query; use a coarser granularity",
+        )
+    return await run_db(db, lambda s: RollupRepository(s).traffic(
+        width, start, end, group_by, route=route, method=method.upper() if method else None,
+        status_code=status_code, user_id=user_id,
+    ))
+
+
+@router.get("/stats/sessions", response_model=List[SessionStats])
+async def session_stats_route(
+    user_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    admin: UserRead = Depends(get_current_admin_user),
+):
+    """Users with the most active sessions, or one user's counters."""
+    return await run_db(db, lambda s: RollupRepository(s).session_stats(user_id=user_id, limit=limit))
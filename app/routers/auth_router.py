@@ -1,29 +1,40 @@
 # app/routers/auth_router.py
-from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response, Request
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.schemas.auth import UserCreate, UserRead, Token
-from app.services.auth_service import AuthService
+from app.schemas.logs import AccessLogRead
+from app.services.auth_service import AuthService, get_current_active_user
 from app.database import get_db
-from app.services.session_service import create_session, end_session
-from app.utils.logging_utils import get_client_ip
+from app.services.session_log_writer import session_log_writer
+from app.services.session_service import create_session, end_session, get_session_for_user, get_session_activity
+from app.utils.jwt_utils import revoke_token
+from app.utils.logging_utils import get_client_ip, has_session_log, export_session_xlsx
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, service: AuthService = Depends(), db: Session = Depends(get_db)):
-    # service.register_user should create and return UserRead
-    return service.register_user(user_in)
+async def register(user_in: UserCreate, service: AuthService = Depends()):
+    # service.register_user should create and return UserRead; it is
+    # serialized once here, response_model only documents the body
+    user = await service.register_user(user_in)
+    return Response(content=user.model_dump_json(), status_code=status.HTTP_201_CREATED, media_type="application/json")
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     request: Request,
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
     service: AuthService = Depends(),
 ):
-    user = service.authenticate_user(form_data.username, form_data.password)
+    user = await service.authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,7 +45,7 @@ def login(
     # create session record and set cookie
     ip = get_client_ip(request)
     user_agent = request.headers.get("user-agent", "unknown")
-    session_id = create_session(db=db, user_id=user.id, ip=ip, user_agent=user_agent)
+    session_id = await create_session(db=db, user_id=user.id, ip=ip, user_agent=user_agent)
 
     # set cookie (httpOnly)
     response.set_cookie(key="session_id", value=session_id, httponly=True, samesite="lax")
@@ -44,12 +55,70 @@ def login(
     return token
 
 @router.post("/logout")
-def logout(request: Request, db: Session = Depends(get_db)):
+async def logout(request: Request, db: Session = Depends(get_db)):
+    # the bearer token, when sent and valid, stops working immediately
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token and not revoke_token(token):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation list is full; try again later",
+        )
+
     session_id = request.cookies.get("session_id")
     if not session_id:
         return {"detail": "no session"}
-    end_session(db=db, session_id=session_id)
-    from fastapi.responses import JSONResponse
+    await end_session(db=db, session_id=session_id)
     response = JSONResponse(content={"detail": "logged out"})
     response.delete_cookie("session_id")
     return response
+
+@router.get("/sessions/{session_id}/export")
+async def export_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: UserRead = Depends(get_current_active_user),
+):
+    if not await get_session_for_user(db, session_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    # rows still buffered in memory belong in the export
+    await run_in_threadpool(session_log_writer.flush, session_id)
+    if not has_session_log(session_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
+    # build the workbook off-heap past 1 MiB, then stream it back in chunks
+    buf = SpooledTemporaryFile(max_size=1024 * 1024)
+    await run_in_threadpool(export_session_xlsx, session_id, buf)
+    buf.seek(0)
+
+    def iter_file():
+        try:
+            while chunk := buf.read(64 * 1024):
+                yield chunk
+        finally:
+            buf.close()
+
+    return StreamingResponse(
+        iter_file(),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f'attachment; filename="session_{session_id}.xlsx"'},
+    )
+
+
+@router.get("/sessions/{session_id}/activity", response_model=List[AccessLogRead])
+async def session_activity(
+    session_id: str,
+    response: Response,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-After header"),
+    db: Session = Depends(get_db),
+    current_user: UserRead = Depends(get_current_active_user),
+):
+    if not await get_session_for_user(db, session_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
+    rows, next_after = await get_session_activity(db, session_id, since, until, limit, after)
+    if next_after:
+        response.headers["X-Next-After"] = next_after
+    return rows
@@ -1,42 +1,112 @@
 # app/routers/item_router.py
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
-from app.schemas.item import ItemCreate, ItemRead
+from app.schemas.item import ItemBulkResult, ItemCreate, ItemRead
 from app.schemas.auth import UserRead
 from app.services.item_service import ItemService
 from app.services.auth_service import get_current_active_user
 
 router = APIRouter(prefix="/items", tags=["items"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 @router.post("/", response_model=ItemRead, status_code=status.HTTP_201_CREATED)
-def create_item_route(
+async def create_item_route(
     item_in: ItemCreate,
     db: Session = Depends(get_db),
     current_user: UserRead = Depends(get_current_active_user),
 ):
     service = ItemService(db=db)
-    return service.create_item_for_user(item_in, current_user)
+    return await service.create_item_response(item_in, current_user)
+
+
+@router.post(
+    "/bulk",
+    response_model=ItemBulkResult,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/ItemCreate"}},
+                },
+                NDJSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/ItemCreate"}},
+            },
+        },
+    },
+)
+async def bulk_create_items_route(
+    request: Request,
+    chunk_size: int = Query(settings.ITEM_BULK_CHUNK_SIZE, ge=1),
+    db: Session = Depends(get_db),
+    current_user: UserRead = Depends(get_current_active_user),
+):
+    # the body is parsed row by row so that one bad item doesn't 422 the batch
+    body = await request.body()
+    ndjson = request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE)
+    service = ItemService(db=db)
+    return await service.bulk_create_items_for_user(body, ndjson, current_user, chunk_size)
+
+
+@router.get(
+    "/",
+    response_model=List[ItemRead],
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}, 304: {"description": "Not modified"}},
+)
+async def list_items_route(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.ITEMS_MAX_PAGE_SIZE),
+    after: Optional[int] = Query(None, description="Return items with an id greater than this cursor"),
+    stream: bool = Query(False, description="Stream every item as NDJSON"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: UserRead = Depends(get_current_active_user),
+):
+    service = ItemService(db=db)
+    if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            service.stream_items_for_user(current_user, after=after),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    # pre-rendered JSON with an ETag; 304 when If-None-Match still matches
+    return await service.list_items_response(current_user, limit=limit, after=after, if_none_match=if_none_match)
 
 
-@router.get("/", response_model=List[ItemRead])
-def list_items_route(
+# registered before /{item_id} so that "search" is not taken for an id
+@router.get("/search", response_model=List[ItemRead], responses={304: {"description": "Not modified"}})
+async def search_items_route(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in title or description (prefix match)"),
+    limit: int = Query(20, ge=1, le=settings.ITEMS_MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-After header"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: UserRead = Depends(get_current_active_user),
 ):
+    """
+    Items matching every word of ``q``, best match first. Pass the
+    X-Next-After header of a page as ``after`` to get the next one. Ranks
+    depend on every indexed item, so items created while paging through
+    results (by anyone) can make later pages skip or repeat a result.
+    """
     service = ItemService(db=db)
-    return service.list_items_for_user(current_user)
+    return await service.search_items_response(current_user, q, limit, after=after, if_none_match=if_none_match)
 
 
-@router.get("/{item_id}", response_model=ItemRead)
-def get_item_route(
+@router.get("/{item_id}", response_model=ItemRead, responses={304: {"description": "Not modified"}})
+async def get_item_route(
     item_id: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: UserRead = Depends(get_current_active_user),
 ):
     service = ItemService(db=db)
-    return service.get_item_for_user(item_id, current_user)
+    return await service.get_item_response(item_id, current_user, if_none_match=if_none_match)
@@ -27,3 +27,20 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    # only present when settings.TOKEN_EMBED_PRINCIPAL was on at login
+    user_id: Optional[int] = None
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    is_active: Optional[bool] = None
+
+    def to_principal(self) -> Optional[UserRead]:
+        if self.user_id is None or self.email is None or self.is_active is None:
+            return None
+        # claims were validated when the token was issued and are signed
+        return UserRead.model_construct(
+            username=self.username,
+            email=self.email,
+            full_name=self.full_name,
+            id=self.user_id,
+            is_active=self.is_active,
+        )
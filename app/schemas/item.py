@@ -1,6 +1,8 @@
 # app/schemas/item.py
-from typing import Optional
-from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+# pydantic needs typing_extensions.TypedDict before Python 3.12
+from typing_extensions import TypedDict
 
 
 class ItemBase(BaseModel):
@@ -17,3 +19,28 @@ class ItemRead(ItemBase):
     owner_id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ItemRow(TypedDict):
+    """ItemRead as a plain dict, for column selects serialized straight to JSON."""
+    title: str
+    description: Optional[str]
+    id: int
+    owner_id: int
+
+
+# built once; dump_json on rows read from the database skips validation
+item_row_adapter = TypeAdapter(ItemRow)
+item_rows_adapter = TypeAdapter(List[ItemRow])
+
+
+class ItemBulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class ItemBulkResult(BaseModel):
+    # ids of the rows that were inserted, in input order (rows listed in
+    # ``errors`` are skipped)
+    created_ids: List[int]
+    errors: List[ItemBulkError]
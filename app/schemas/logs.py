@@ -0,0 +1,18 @@
+# app/schemas/logs.py
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class AccessLogRead(BaseModel):
+    id: int
+    session_id: Optional[str] = None
+    user_id: Optional[int] = None
+    path: Optional[str] = None
+    method: Optional[str] = None
+    status_code: Optional[int] = None
+    ip: Optional[str] = None
+    user_agent: Optional[str] = None
+    timestamp: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,23 @@
+# app/schemas/stats.py
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class TrafficBucket(BaseModel):
+    bucket: datetime
+    count: int
+    # only the dimensions asked for in group_by are set
+    route: Optional[str] = None
+    method: Optional[str] = None
+    status_code: Optional[int] = None
+    user_id: Optional[int] = None
+
+
+class SessionStats(BaseModel):
+    user_id: int
+    active_sessions: int
+    total_sessions: int
+    last_login_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,212 @@
+# app/services/access_log_writer.py
+import asyncio
+import random
+import sys
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.database import SessionLocal
+from app.repositories.access_log_repository import AccessLogRepository, apply_retention
+from app.repositories.rollup_repository import RollupRepository
+from app.services.session_service import session_store
+
+BACKPRESSURE_POLICIES = ("drop", "block", "sample")
+
+
+class AccessLogWriter:
+    """
+    In-process access-log pipeline.
+
+    The middleware submits compact records to a bounded queue; a background
+    task flushes them to ``access_logs`` in bulk, every ``batch_size`` rows or
+    every ``flush_interval_ms``, whichever comes first, adding them to the
+    traffic rollups in the same transaction. The same task applies the
+    partition retention policy every ``retention_interval`` seconds and
+    compacts the rollups every ``compact_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval_ms: int = 250,
+        backpressure: str = "drop",
+        sample_rate: float = 0.1,
+        shutdown_timeout: float = 10.0,
+        retention_interval: float = 3600.0,
+        compact_interval: float = 600.0,
+    ):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown access log backpressure policy: {backpressure!r}")
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.backpressure = backpressure
+        self.sample_rate = sample_rate
+        self.shutdown_timeout = shutdown_timeout
+        self.retention_interval = retention_interval
+        self._last_retention = 0.0
+        self.compact_interval = compact_interval
+        self._last_compact = 0.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        if self.running:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._batch_ready = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop accepting records and drain whatever is still queued."""
+        if not self.running:
+            return
+        self._closing = True
+        self._batch_ready.set()
+        try:
+            await asyncio.wait_for(self._task, self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            print(f"Access log writer did not drain in time, {self.qsize()} records lost", file=sys.stderr)
+        self._task = None
+
+    async def submit(self, record: Dict[str, Any]):
+        if not self.running:
+            if self._closing:
+                self.dropped += 1
+                return
+            self.start()
+        queue = self._queue
+
+        if self.backpressure == "block":
+            await queue.put(record)
+        else:
+            if (
+                self.backpressure == "sample"
+                and queue.qsize() >= self.batch_size
+                and random.random() >= self.sample_rate
+            ):
+                self.sampled_out += 1
+                return
+            try:
+                queue.put_nowait(record)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                return
+
+        self.enqueued += 1
+        if queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self._drain()
+            if time.monotonic() - self._last_retention >= self.retention_interval:
+                self._last_retention = time.monotonic()
+                await asyncio.to_thread(self._apply_retention)
+            if settings.ROLLUPS_ENABLED and time.monotonic() - self._last_compact >= self.compact_interval:
+                self._last_compact = time.monotonic()
+                await asyncio.to_thread(self._compact_rollups)
+        await self._drain()
+
+    async def _drain(self):
+        queue = self._queue
+        if not queue.empty():
+            # rows reference user_sessions; write the sessions first
+            await session_store.flush()
+        while not queue.empty():
+            batch: List[Dict[str, Any]] = []
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            await asyncio.to_thread(self._write_batch, batch)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        db = SessionLocal()
+        try:
+            # "route" (the path template) only feeds the rollups
+            AccessLogRepository(db).insert_many([{k: v for k, v in r.items() if k != "route"} for r in batch])
+            # after insert_many: a new day's partition is created on another connection
+            if settings.ROLLUPS_ENABLED:
+                RollupRepository(db).add_requests(batch)
+            db.commit()
+            self.written += len(batch)
+            self.flushes += 1
+        except Exception:
+            traceback.print_exc()
+            db.rollback()
+            self.failed += len(batch)
+        finally:
+            db.close()
+
+    def _apply_retention(self):
+        if not settings.ACCESS_LOG_PARTITIONED:
+            return
+        try:
+            dropped = apply_retention(settings.ACCESS_LOG_RETENTION_DAYS, settings.ACCESS_LOG_ARCHIVE_DIR or None)
+            if dropped:
+                print(f"Access log retention dropped {', '.join(dropped)}", file=sys.stderr)
+        except Exception:
+            traceback.print_exc()
+
+    def _compact_rollups(self):
+        db = SessionLocal()
+        try:
+            RollupRepository(db).compact(
+                settings.ROLLUP_MINUTE_RETENTION_HOURS * 3600,
+                settings.ROLLUP_HOUR_RETENTION_DAYS * 86400,
+                settings.ROLLUP_DAY_RETENTION_DAYS * 86400,
+            )
+        except Exception:
+            traceback.print_exc()
+            db.rollback()
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+
+access_log_writer = AccessLogWriter(
+    max_queue=settings.ACCESS_LOG_QUEUE_SIZE,
+    batch_size=settings.ACCESS_LOG_BATCH_SIZE,
+    flush_interval_ms=settings.ACCESS_LOG_FLUSH_INTERVAL_MS,
+    backpressure=settings.ACCESS_LOG_BACKPRESSURE,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    shutdown_timeout=settings.ACCESS_LOG_SHUTDOWN_TIMEOUT,
+    retention_interval=settings.ACCESS_LOG_RETENTION_INTERVAL,
+    compact_interval=settings.ROLLUP_COMPACT_INTERVAL,
+)
@@ -7,49 +7,71 @@ from jose import JWTError
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.repositories.user_repository import UserRepository
+from app.config import settings
+from app.repositories.user_repository import AsyncUserRepository, principal_cache
 from app.schemas.auth import UserCreate, UserRead, Token, TokenData
-from app.utils.hashing import verify_password
+from app.utils.cache import MISSING
+from app.utils.hashing import HashingBusyError, hash_password_async, verify_password_async
 from app.utils.jwt_utils import create_access_token, decode_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+async def _run_hashing(coro):
+    try:
+        return await coro
+    except HashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+
 class AuthService:
     def __init__(self, db: Session = Depends(get_db)):
         self.db = db
-        self.user_repo = UserRepository(self.db)
+        self.user_repo = AsyncUserRepository(self.db)
 
-    def register_user(self, user_in: UserCreate) -> UserRead:
-        if self.user_repo.get_by_username(user_in.username):
+    async def register_user(self, user_in: UserCreate) -> UserRead:
+        if await self.user_repo.get_by_username(user_in.username):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already registered",
             )
 
-        if self.user_repo.get_by_email(user_in.email):
+        if await self.user_repo.get_by_email(user_in.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered",
             )
 
-        user = self.user_repo.create(user_in)
+        hashed = await _run_hashing(hash_password_async(user_in.password))
+        user = await self.user_repo.create(user_in, hashed)
         return UserRead.model_validate(user)
 
-    def authenticate_user(self, username: str, password: str) -> Optional[UserRead]:
-        user = self.user_repo.get_by_username(username)
+    async def authenticate_user(self, username: str, password: str) -> Optional[UserRead]:
+        user = await self.user_repo.get_by_username(username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await _run_hashing(verify_password_async(password, user.hashed_password)):
             return None
         return UserRead.model_validate(user)
 
     def create_login_token(self, user: UserRead) -> Token:
-        access_token = create_access_token({"sub": user.username})
+        claims = {"sub": user.username}
+        if settings.TOKEN_EMBED_PRINCIPAL:
+            claims.update(
+                uid=user.id,
+                email=user.email,
+                name=user.full_name,
+                active=user.is_active,
+            )
+        access_token = create_access_token(claims)
         return Token(access_token=access_token, token_type="bearer")
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ) -> UserRead:
@@ -64,14 +86,31 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = UserRepository(db).get_by_username(token_data.username)
-    if not user:
-        raise credentials_exception
+    principal = principal_cache.get(token_data.username)
+    if principal is MISSING or principal is None:
+        # embedded claims (TOKEN_EMBED_PRINCIPAL) need no database access,
+        # unless the user was changed on another worker (cached as None)
+        principal = token_data.to_principal() if principal is MISSING else None
+        if principal is None:
+            user = await AsyncUserRepository(db).get_by_username(token_data.username)
+            if not user:
+                raise credentials_exception
+            principal = UserRead.model_validate(user)
+            principal_cache.set(token_data.username, principal)
 
-    return UserRead.model_validate(user)
+    return principal
 
 
-def get_current_active_user(current_user: UserRead = Depends(get_current_user)) -> UserRead:
+async def get_current_active_user(current_user: UserRead = Depends(get_current_user)) -> UserRead:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+ADMIN_USERNAMES = frozenset(name.strip() for name in settings.ADMIN_USERNAMES.split(",") if name.strip())
+
+
+async def get_current_admin_user(current_user: UserRead = Depends(get_current_active_user)) -> UserRead:
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
@@ -0,0 +1,186 @@
+# app/services/invalidation_bus.py
+import asyncio
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+
+from app.config import settings
+from app.database import engine, write_engine
+from app.models.invalidation import CacheInvalidation
+
+
+class InvalidationBus:
+    """
+    Cross-worker cache invalidation over a change-feed table in the database.
+
+    ``publish`` queues an event in memory (thread-safe, no I/O) and wakes the
+    background task, which inserts it and, every ``poll_interval_ms``, reads
+    the events other workers published since its last poll and runs the
+    handlers registered with ``subscribe`` for their channel. An event
+    reaches every other worker within about one poll interval. The
+    publishing worker is expected to have invalidated its own caches already.
+    """
+
+    def __init__(self, enabled: bool = False, poll_interval_ms: int = 100, retention_seconds: float = 300.0, batch_size: int = 1000):
+        self.enabled = enabled
+        self.poll_interval = poll_interval_ms / 1000.0
+        self.retention = retention_seconds
+        self.batch_size = batch_size
+        self.origin = uuid.uuid4().hex[:16]
+
+        self._handlers: Dict[str, List[Callable[[str], None]]] = {}
+        self._outbox: List[dict] = []
+        self._lock = threading.Lock()
+        self._last_id: Optional[int] = None
+        self._last_prune = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self.published = 0
+        self.sent = 0
+        self.received = 0
+        self.polls = 0
+        self.errors = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def publish(self, channel: str, key: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._outbox.append({"channel": channel, "key": key, "origin": self.origin, "created_at": time.time()})
+            self.published += 1
+        loop = self._loop
+        if loop is not None and self.running:
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self._closing = False
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._closing = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        self._loop = None
+
+    async def _run(self):
+        backlog = False
+        while not self._closing:
+            if not backlog:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            backlog = await asyncio.to_thread(self._tick)
+        await asyncio.to_thread(self._flush)
+
+    def _tick(self) -> bool:
+        try:
+            self._flush()
+            backlog = self._poll()
+            if time.monotonic() - self._last_prune >= self.retention / 2:
+                self._last_prune = time.monotonic()
+                self._prune()
+            return backlog
+        except Exception:
+            traceback.print_exc()
+            self.errors += 1
+            return False
+
+    def _flush(self):
+        with self._lock:
+            rows, self._outbox = self._outbox, []
+        if not rows:
+            return
+        try:
+            with write_engine.begin() as conn:
+                conn.execute(insert(CacheInvalidation), rows)
+            self.sent += len(rows)
+        except Exception:
+            # put them back in front; they go out with the next tick
+            with self._lock:
+                self._outbox[:0] = rows
+            raise
+
+    def _poll(self) -> bool:
+        """Apply new events from other workers. True when there may be more."""
+        table = CacheInvalidation.__table__
+        with engine.connect() as conn:
+            if self._last_id is None:
+                # start from the tail: history predates this worker's caches
+                self._last_id = conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar_one()
+                return False
+            rows = conn.execute(
+                select(table.c.id, table.c.channel, table.c.key, table.c.origin, table.c.created_at)
+                .where(table.c.id > self._last_id)
+                .order_by(table.c.id)
+                .limit(self.batch_size)
+            ).all()
+        self.polls += 1
+        now = time.time()
+        for row in rows:
+            self._last_id = row.id
+            if row.origin == self.origin:
+                continue
+            self.received += 1
+            self.last_lag_ms = (now - row.created_at) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+            for handler in self._handlers.get(row.channel, ()):
+                try:
+                    handler(row.key)
+                except Exception:
+                    traceback.print_exc()
+                    self.errors += 1
+        return len(rows) >= self.batch_size
+
+    def _prune(self):
+        # the newest row always stays: a table created without AUTOINCREMENT
+        # would otherwise hand out ids below every worker's _last_id again
+        table = CacheInvalidation.__table__
+        with write_engine.begin() as conn:
+            conn.execute(delete(table).where(
+                table.c.created_at < time.time() - self.retention,
+                table.c.id < select(func.max(table.c.id)).scalar_subquery(),
+            ))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "published": self.published,
+            "sent": self.sent,
+            "received": self.received,
+            "polls": self.polls,
+            "errors": self.errors,
+            "pending": len(self._outbox),
+            "last_lag_ms": round(self.last_lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+        }
+
+
+invalidation_bus = InvalidationBus(
+    enabled=settings.CACHE_BUS_ENABLED,
+    poll_interval_ms=settings.CACHE_BUS_POLL_INTERVAL_MS,
+    retention_seconds=settings.CACHE_BUS_RETENTION_SECONDS,
+)
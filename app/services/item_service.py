@@ -1,33 +1,242 @@
 # app/services/item_service.py
-from typing import List
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.database import get_db
-from app.repositories.item_repository import ItemRepository
-from app.schemas.item import ItemCreate, ItemRead
+from app.config import settings
+from app.database import get_db, SessionLocal, AsyncSessionLocal
+from app.repositories.item_repository import AsyncItemRepository, ItemRepository
+from app.schemas.item import (
+    ItemBulkError, ItemBulkResult, ItemCreate, ItemRead, ItemRow, item_row_adapter, item_rows_adapter,
+)
 from app.schemas.auth import UserRead
+from app.utils.cache import TTLCache, MISSING
+
+# (owner_id, items version, variant...) -> (body, extra headers). The
+# version is read from item_versions on every request and a write bumps it
+# in its own transaction, so no worker hits a stale entry; they age out.
+item_response_cache = TTLCache(maxsize=settings.ITEM_RESPONSE_CACHE_SIZE, ttl=3600)
 
 
 class ItemService:
     def __init__(self, db: Session = Depends(get_db)):
         self.db = db
-        self.item_repo = ItemRepository(self.db)
+        self.item_repo = AsyncItemRepository(self.db)
 
-    def create_item_for_user(self, item_in: ItemCreate, user: UserRead) -> ItemRead:
-        item = self.item_repo.create_for_user(owner_id=user.id, item_in=item_in)
+    async def create_item_for_user(self, item_in: ItemCreate, user: UserRead) -> ItemRead:
+        item = await self.item_repo.create_for_user(owner_id=user.id, item_in=item_in)
         return ItemRead.model_validate(item)
 
-    def list_items_for_user(self, user: UserRead) -> List[ItemRead]:
-        items = self.item_repo.list_for_user(owner_id=user.id)
-        return [ItemRead.model_validate(i) for i in items]
+    async def create_item_response(self, item_in: ItemCreate, user: UserRead) -> Response:
+        """POST /items/, serialized once here instead of again by response_model."""
+        item = await self.create_item_for_user(item_in, user)
+        return Response(content=item.model_dump_json(), status_code=status.HTTP_201_CREATED, media_type="application/json")
+
+    async def bulk_create_items_for_user(self, body: bytes, ndjson: bool, user: UserRead, chunk_size: int) -> ItemBulkResult:
+        """Validate a JSON array (or NDJSON) of ItemCreate in one pass and insert the valid rows."""
+        # parsing and validating thousands of rows is CPU work, keep it off the loop
+        valid, errors = await run_in_threadpool(_validate_bulk_body, body, ndjson)
+
+        created_ids: List[int] = []
+        if valid:
+            created_ids = await self.item_repo.bulk_create_for_user(owner_id=user.id, items_in=valid, chunk_size=chunk_size)
+        return ItemBulkResult(created_ids=created_ids, errors=errors)
+
+    async def list_items_response(
+        self,
+        user: UserRead,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        if_none_match: Optional[str] = None,
+    ) -> Response:
+        """GET /items/ with ETag revalidation and a cache of serialized bodies."""
+        # before the rows: a write in between then only makes the body newer
+        version = await self.item_repo.version_for_user(user.id)
+        etag = _etag(user.id, version)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        key = (user.id, version, "list", limit, after)
+        cached = item_response_cache.get(key)
+        if cached is MISSING:
+            # column tuples straight to JSON bytes, nothing validated twice
+            rows = await self.item_repo.list_rows_for_user(owner_id=user.id, limit=limit, after=after)
+            headers = {}
+            if limit is not None and len(rows) == limit:
+                headers["X-Next-After"] = str(rows[-1]["id"])
+            cached = (item_rows_adapter.dump_json(rows), headers)
+            item_response_cache.set(key, cached)
+        body, headers = cached
+        return _json_response(body, etag, headers)
+
+    async def get_item_response(self, item_id: int, user: UserRead, if_none_match: Optional[str] = None) -> Response:
+        """
+        GET /items/{item_id} with ETag revalidation. The ETag follows the
+        owner's version, so any write to the owner's items changes it.
+        """
+        # before the rows: a write in between then only makes the body newer
+        version = await self.item_repo.version_for_user(user.id)
+        etag = _etag(user.id, version)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        key = (user.id, version, "item", item_id)
+        body = item_response_cache.get(key)
+        if body is MISSING:
+            row = await self.item_repo.get_row_by_id_and_owner(item_id=item_id, owner_id=user.id)
+            if row is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+            body = item_row_adapter.dump_json(row)
+            item_response_cache.set(key, body)
+        return _json_response(body, etag)
+
+    async def search_items_response(
+        self,
+        user: UserRead,
+        q: str,
+        limit: int,
+        after: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+    ) -> Response:
+        """GET /items/search: bm25-ranked full-text search, same ETag and body cache as the list."""
+        # before the rows: a write in between then only makes the body newer
+        version = await self.item_repo.version_for_user(user.id)
+        etag = _etag(user.id, version)
+        if _etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+
+        key = (user.id, version, "search", q, limit, after)
+        cached = item_response_cache.get(key)
+        if cached is MISSING:
+            try:
+                rows, next_after = await self.item_repo.search_rows_for_user(owner_id=user.id, q=q, limit=limit, after=after)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid search cursor")
+            cached = (item_rows_adapter.dump_json(rows), {"X-Next-After": next_after} if next_after else {})
+            item_response_cache.set(key, cached)
+        body, headers = cached
+        return _json_response(body, etag, headers)
+
+    def stream_items_for_user(
+        self, user: UserRead, after: Optional[int] = None
+    ) -> Union[Iterator[bytes], AsyncIterator[bytes]]:
+        """
+        Yield the user's items as NDJSON, one chunk per batch.
+
+        The generator outlives the request's dependencies, so it reads
+        through its own session rather than ``self.db``.
+        """
+        if AsyncSessionLocal is not None:
+            return _astream_items(user.id, after)
+        return _stream_items(user.id, after)
+
+
+def _etag(owner_id: int, version: int) -> str:
+    return f'"{owner_id}-{version}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
 
-    def get_item_for_user(self, item_id: int, user: UserRead) -> ItemRead:
-        item = self.item_repo.get_by_id_and_owner(item_id=item_id, owner_id=user.id)
-        if not item:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Item not found",
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+def _json_response(body: bytes, etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache", **(headers or {})},
+    )
+
+
+def _ndjson_chunk(rows: List[ItemRow]) -> bytes:
+    return b"".join([item_row_adapter.dump_json(row) + b"\n" for row in rows])
+
+
+def _stream_items(owner_id: int, after: Optional[int]) -> Iterator[bytes]:
+    batch_size = settings.ITEMS_STREAM_BATCH_SIZE
+    db = SessionLocal()
+    try:
+        batch = []
+        for row in ItemRepository(db).iter_rows_for_user(owner_id=owner_id, after=after, batch_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield _ndjson_chunk(batch)
+                batch = []
+        if batch:
+            yield _ndjson_chunk(batch)
+    finally:
+        db.close()
+
+
+async def _astream_items(owner_id: int, after: Optional[int]) -> AsyncIterator[bytes]:
+    batch_size = settings.ITEMS_STREAM_BATCH_SIZE
+    async with AsyncSessionLocal() as db:
+        batch = []
+        async for row in AsyncItemRepository(db).iter_rows_for_user(owner_id=owner_id, after=after, batch_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield _ndjson_chunk(batch)
+                batch = []
+        if batch:
+            yield _ndjson_chunk(batch)
+
+
+def _validate_bulk_body(body: bytes, ndjson: bool) -> Tuple[List[ItemCreate], List[ItemBulkError]]:
+    rows = _parse_bulk_body(body, ndjson)
+    if len(rows) > settings.ITEM_BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.ITEM_BULK_MAX_ROWS} items per request",
+        )
+
+    valid: List[ItemCreate] = []
+    errors: List[ItemBulkError] = []
+    for index, row in enumerate(rows):
+        try:
+            if isinstance(row, Exception):
+                raise row
+            valid.append(ItemCreate.model_validate(row))
+        except ValidationError as exc:
+            detail = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc']) or 'item'}: {err['msg']}"
+                for err in exc.errors()
             )
-        return ItemRead.model_validate(item)
+            errors.append(ItemBulkError(index=index, detail=detail))
+        except ValueError as exc:
+            errors.append(ItemBulkError(index=index, detail=f"invalid JSON: {exc}"))
+    return valid, errors
+
+
+def _parse_bulk_body(body: bytes, ndjson: bool) -> List[Any]:
+    # NDJSON lines that fail to parse become per-row errors; a malformed
+    # JSON array rejects the whole request
+    if ndjson:
+        rows: List[Any] = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                rows.append(exc)
+        return rows
+
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array")
+    return rows
@@ -0,0 +1,220 @@
+# app/services/session_log_writer.py
+import asyncio
+import csv
+import gzip
+import os
+import shutil
+import threading
+import traceback
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.logging_utils import SESSION_LOG_HEADER, session_log_path
+
+EXTENSIONS = ("txt", "csv")
+
+
+class SessionLogWriter:
+    """
+    Buffered writer for the per-session text and CSV logs.
+
+    ``append`` only adds to an in-memory buffer. A background task writes the
+    buffers out every ``flush_interval_ms``, or as soon as ``buffer_bytes`` are
+    pending, through an LRU pool of at most ``max_open_files`` append handles.
+    ``close_session`` flushes a session, closes its handles and gzips its files.
+    Lines appended after ``stop`` are dropped.
+    """
+
+    def __init__(
+        self,
+        buffer_bytes: int = 64 * 1024,
+        flush_interval_ms: int = 1000,
+        max_open_files: int = 128,
+        fsync: bool = False,
+        compress: bool = True,
+    ):
+        self.buffer_bytes = buffer_bytes
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_open_files = max_open_files
+        self.fsync = fsync
+        self.compress = compress
+
+        # (session_id, ext) -> pending text lines or CSV rows
+        self._buffers: Dict[Tuple[str, str], list] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        # serialises file I/O between the flush task and close_session
+        self._io_lock = threading.Lock()
+        self._handles: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+
+        self._task: Optional[asyncio.Task] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self.appended = 0
+        self.flushes = 0
+        self.opens = 0
+        self.rotated = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._closing = False
+        self._flush_now = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.running:
+            self._closing = True
+            self._flush_now.set()
+            await self._task
+            self._task = None
+        await asyncio.to_thread(self.close)
+
+    def append(self, session_id: str, line: str, row: List):
+        if self._closing and not self.running:
+            # after stop(): nothing would write these out any more
+            self.dropped += 1
+            return
+        with self._lock:
+            self._buffers.setdefault((session_id, "txt"), []).append(line)
+            self._buffers.setdefault((session_id, "csv"), []).append(row)
+            # the CSV row is about as long as the text line
+            self._pending += 2 * len(line)
+            self.appended += 1
+            full = self._pending >= self.buffer_bytes
+        if not full:
+            return
+        if not self.running:
+            try:
+                # never write files on the event loop, even before start()
+                self.start()
+            except RuntimeError:
+                # no event loop: a plain synchronous caller
+                self.flush()
+                return
+        self._flush_now.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            if self._pending:
+                await asyncio.to_thread(self.flush)
+
+    def _take(self, session_id: Optional[str] = None) -> Dict[Tuple[str, str], list]:
+        with self._lock:
+            if session_id is None:
+                taken, self._buffers, self._pending = self._buffers, {}, 0
+            else:
+                taken = {}
+                for ext in EXTENSIONS:
+                    entries = self._buffers.pop((session_id, ext), None)
+                    if entries:
+                        taken[(session_id, ext)] = entries
+                self._pending = max(0, self._pending - 2 * sum(map(len, taken.get((session_id, "txt"), ()))))
+        return taken
+
+    def _handle(self, key: Tuple[str, str]):
+        fh = self._handles.get(key)
+        if fh is not None:
+            self._handles.move_to_end(key)
+            return fh
+        session_id, ext = key
+        path = session_log_path(session_id, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(path, "a", encoding="utf-8", newline="" if ext == "csv" else None)
+        self.opens += 1
+        if ext == "csv" and fh.tell() == 0:
+            csv.writer(fh).writerow(SESSION_LOG_HEADER)
+        self._handles[key] = fh
+        while len(self._handles) > self.max_open_files:
+            _, old = self._handles.popitem(last=False)
+            old.close()
+        return fh
+
+    def _write(self, taken: Dict[Tuple[str, str], list]):
+        for key, entries in taken.items():
+            try:
+                fh = self._handle(key)
+                if key[1] == "csv":
+                    csv.writer(fh).writerows(entries)
+                else:
+                    fh.write("\n".join(entries) + "\n")
+                fh.flush()
+                if self.fsync:
+                    os.fsync(fh.fileno())
+            except Exception:
+                traceback.print_exc()
+                self.failed += len(entries)
+        if taken:
+            self.flushes += 1
+
+    def flush(self, session_id: Optional[str] = None):
+        """Write out pending lines (all sessions, or one). Blocking."""
+        with self._io_lock:
+            self._write(self._take(session_id))
+
+    def close(self):
+        with self._io_lock:
+            self._write(self._take())
+            for fh in self._handles.values():
+                fh.close()
+            self._handles.clear()
+
+    def rotate(self, session_id: str):
+        """Flush and close an ended session's files, then gzip them. Blocking."""
+        with self._io_lock:
+            self._write(self._take(session_id))
+            for ext in EXTENSIONS:
+                fh = self._handles.pop((session_id, ext), None)
+                if fh is not None:
+                    fh.close()
+            if not self.compress:
+                return
+            for ext in EXTENSIONS:
+                path = session_log_path(session_id, ext)
+                if not path.exists():
+                    continue
+                try:
+                    # "ab": a session rotated twice gets a second gzip member
+                    with open(path, "rb") as src, gzip.open(f"{path}.gz", "ab") as dst:
+                        shutil.copyfileobj(src, dst)
+                    path.unlink()
+                    self.rotated += 1
+                except Exception:
+                    traceback.print_exc()
+
+    async def close_session(self, session_id: str):
+        await asyncio.to_thread(self.rotate, session_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_bytes": self._pending,
+            "open_files": len(self._handles),
+            "appended": self.appended,
+            "flushes": self.flushes,
+            "opens": self.opens,
+            "rotated": self.rotated,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+session_log_writer = SessionLogWriter(
+    buffer_bytes=settings.SESSION_LOG_BUFFER_BYTES,
+    flush_interval_ms=settings.SESSION_LOG_FLUSH_INTERVAL_MS,
+    max_open_files=settings.SESSION_LOG_MAX_OPEN_FILES,
+    fsync=settings.SESSION_LOG_FSYNC,
+    compress=settings.SESSION_LOG_COMPRESS_ON_END,
+)
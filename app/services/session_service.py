@@ -1,20 +1,49 @@
 # app/services/session_service.py
-import uuid
-from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from app.config import settings
 from app.models.logs import UserSession
+from app.database import UnitOfWork, run_db
+from app.repositories.access_log_repository import AccessLogRepository
+from app.services.invalidation_bus import invalidation_bus
+from app.services.session_log_writer import session_log_writer
+from app.services.session_store import create_session_store
+from app.utils.cache import TTLCache, MISSING
 
-def create_session(db: Session, user_id: int, ip: str, user_agent: str) -> str:
-    session_id = uuid.uuid4().hex
-    session = UserSession(id=session_id, user_id=user_id, ip=ip, user_agent=user_agent)
-    db.add(session)
-    db.commit()
+# session_id -> (user_id, active); unknown ids are cached as (None, False)
+session_cache = TTLCache(maxsize=settings.SESSION_CACHE_SIZE, ttl=settings.SESSION_CACHE_TTL)
+# other workers only need to forget the session; the next lookup reads it back
+invalidation_bus.subscribe("session", session_cache.invalidate)
+
+# "database" or "write_behind", see SESSION_STORE; the coroutines below
+# accept either a Session or an AsyncSession (see app.database.run_db)
+session_store = create_session_store(session_cache)
+
+async def create_session(db, user_id: int, ip: str, user_agent: str) -> str:
+    session_id = await session_store.create(db, user_id, ip, user_agent)
+    session_cache.set(session_id, (user_id, True))
     return session_id
 
-def end_session(db: Session, session_id: str):
-    sess = db.query(UserSession).filter(UserSession.id == session_id, UserSession.active == True).first()
-    if sess:
-        sess.active = False
-        sess.ended_at = datetime.utcnow()
-        db.add(sess)
-        db.commit()
+async def end_session(db, session_id: str):
+    user_id = await session_store.end(db, session_id)
+    session_cache.set(session_id, (user_id, False))
+    await session_log_writer.close_session(session_id)
+
+async def lookup_active_session(session_id: str, uow: Optional[UnitOfWork] = None) -> Optional[int]:
+    """Return the user id owning an active session, or None. Cached; a miss reads through ``uow`` if given."""
+    cached = session_cache.get(session_id)
+    if cached is MISSING:
+        user_id = await session_store.lookup(session_id, uow)
+        cached = (user_id, user_id is not None)
+        session_cache.set(session_id, cached)
+    user_id, active = cached
+    return user_id if active else None
+
+async def get_session_for_user(db, session_id: str, user_id: int) -> Optional[UserSession]:
+    return await session_store.get_for_user(db, session_id, user_id)
+
+async def get_session_activity(db, session_id: str, since=None, until=None, limit: int = 100, after: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    try:
+        return await run_db(db, lambda s: AccessLogRepository(s).activity_for_session(session_id, since, until, limit, after))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid activity cursor")
@@ -0,0 +1,484 @@
+# app/services/session_store.py
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import UnitOfWork, db_session, run_db, write_engine
+from app.models.logs import UserSession
+from app.repositories.rollup_repository import RollupRepository
+from app.services.invalidation_bus import invalidation_bus
+from app.utils.cache import TTLCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: no journal locking, run a single worker
+    fcntl = None
+
+
+def _insert_session(db: Session, session_id: str, user_id: int, ip: str, user_agent: str):
+    session = UserSession(id=session_id, user_id=user_id, ip=ip, user_agent=user_agent)
+    db.add(session)
+    if settings.ROLLUPS_ENABLED:
+        RollupRepository(db).adjust_sessions({user_id: (1, 1, datetime.now(timezone.utc))})
+    db.commit()
+
+def _deactivate_session(db: Session, session_id: str) -> Optional[int]:
+    sess = db.query(UserSession).filter(UserSession.id == session_id, UserSession.active == True).first()
+    if not sess:
+        return None
+    sess.active = False
+    sess.ended_at = datetime.utcnow()
+    db.add(sess)
+    if settings.ROLLUPS_ENABLED:
+        RollupRepository(db).adjust_sessions({sess.user_id: (-1, 0, None)})
+    db.commit()
+    return sess.user_id
+
+def _active_session_user(db: Session, session_id: str) -> Optional[int]:
+    row = db.query(UserSession.user_id).filter(UserSession.id == session_id, UserSession.active == True).first()
+    return row.user_id if row else None
+
+def _session_state(db: Session, session_id: str) -> Optional[Tuple[int, bool]]:
+    row = db.query(UserSession.user_id, UserSession.active).filter(UserSession.id == session_id).first()
+    return (row.user_id, bool(row.active)) if row else None
+
+def _session_for_user(db: Session, session_id: str, user_id: int) -> Optional[UserSession]:
+    return db.query(UserSession).filter(UserSession.id == session_id, UserSession.user_id == user_id).first()
+
+
+class DatabaseSessionStore:
+    """Every login and logout commits to ``user_sessions`` before it returns."""
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+
+    async def create(self, db, user_id: int, ip: str, user_agent: str) -> str:
+        session_id = uuid.uuid4().hex
+        await run_db(db, _insert_session, session_id, user_id, ip, user_agent)
+        return session_id
+
+    async def end(self, db, session_id: str) -> Optional[int]:
+        user_id = await run_db(db, _deactivate_session, session_id)
+        invalidation_bus.publish("session", session_id)
+        return user_id
+
+    async def lookup(self, session_id: str, uow: Optional[UnitOfWork] = None) -> Optional[int]:
+        async with db_session(uow) as db:
+            return await run_db(db, _active_session_user, session_id)
+
+    async def get_for_user(self, db, session_id: str, user_id: int) -> Optional[UserSession]:
+        return await run_db(db, _session_for_user, session_id, user_id)
+
+    def recover(self):
+        pass
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def flush(self):
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class WriteBehindSessionStore:
+    """
+    Session store that keeps logins and logouts out of the database
+    transaction path.
+
+    ``create`` and ``end`` update an in-memory table of the sessions changed
+    since the last flush and append the change to a local journal (flushed to
+    the OS, optionally fsynced) before returning. A background task writes
+    the changes to ``user_sessions`` in batches every ``flush_interval_ms``,
+    then deletes the journal segment they came from. ``recover`` replays the
+    segments a crashed worker left behind.
+
+    Session ids are ``<random>.<user_id>.<issued at>.<hmac>``, so any worker
+    can tell who owns a session that has not reached the database yet. That
+    is trusted for ``grace_seconds`` after issue only: a signed id that is
+    still missing from the database after that is unknown. Logouts are
+    published on the invalidation bus once they are persisted.
+    """
+
+    def __init__(
+        self,
+        cache: TTLCache,
+        journal_dir: str = "logs/session_journal",
+        flush_interval_ms: int = 200,
+        batch_size: int = 1000,
+        fsync: bool = False,
+        grace_seconds: float = 60.0,
+        secret: str = settings.SECRET_KEY,
+    ):
+        self.cache = cache
+        self.journal_dir = Path(journal_dir)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.grace_seconds = grace_seconds
+        # a key of its own, so that session ids and JWTs never share signatures
+        self._key = hmac.new(secret.encode(), b"session-id", hashlib.sha256).digest()
+
+        # session_id -> {"user_id", "active", "ip", "user_agent", "created_at"}
+        self._live: Dict[str, dict] = {}
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        # serialises persistence between the flush task and explicit flushes
+        self._io_lock = threading.Lock()
+        self._journal = None
+        self._journal_path: Optional[Path] = None
+        self._sealed: List[Tuple[object, Path]] = []
+
+        self._task: Optional[asyncio.Task] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self.created = 0
+        self.ended = 0
+        self.persisted = 0
+        self.flushes = 0
+        self.failed = 0
+        self.replayed = 0
+
+    # -- session ids ---------------------------------------------------------
+
+    def _sign(self, body: str) -> str:
+        return hmac.new(self._key, body.encode(), hashlib.sha256).hexdigest()[:16]
+
+    def new_session_id(self, user_id: int) -> str:
+        # at most 61 characters: user_sessions.id is a String(64)
+        body = f"{secrets.token_hex(12)}.{user_id}.{int(time.time()):x}"
+        return f"{body}.{self._sign(body)}"
+
+    def owner_of(self, session_id: str, now: Optional[float] = None) -> Optional[int]:
+        """
+        User id a signed session id was issued to, if it was issued within
+        ``grace_seconds``; None for older, unsigned or forged ids.
+        """
+        body, _, sig = session_id.rpartition(".")
+        parts = body.split(".")
+        if len(parts) != 3 or not sig or not hmac.compare_digest(sig, self._sign(body)):
+            return None
+        _, raw_user, raw_issued = parts
+        if (time.time() if now is None else now) - int(raw_issued, 16) > self.grace_seconds:
+            return None
+        return int(raw_user)
+
+    # -- journal ---------------------------------------------------------------
+
+    def _open_journal(self):
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{time.time_ns():020d}-{os.getpid()}"
+        # created and locked under a name recover() ignores, then renamed into
+        # place: recover() never finds a live segment it can lock. The lock
+        # is held until the segment is persisted and deleted.
+        staging = self.journal_dir / f".{name}.tmp"
+        fd = os.open(staging, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        self._journal_path = self.journal_dir / f"{name}.jsonl"
+        os.replace(staging, self._journal_path)
+        self._journal = open(fd, "a", encoding="utf-8")
+
+    def _append(self, op: dict) -> int:
+        with self._lock:
+            if self._journal is None:
+                self._open_journal()
+            self._journal.write(json.dumps(op, separators=(",", ":")) + "\n")
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._pending.append(op)
+            return len(self._pending)
+
+    async def _record(self, op: dict):
+        pending = await asyncio.to_thread(self._append, op) if self.fsync else self._append(op)
+        if pending >= self.batch_size and self.running:
+            self._flush_now.set()
+
+    def _take(self) -> Tuple[List[dict], List[Tuple[object, Path]]]:
+        with self._lock:
+            ops, self._pending = self._pending, []
+            if self._journal is not None:
+                # new changes go to a fresh segment; this one is deleted once persisted
+                self._sealed.append((self._journal, self._journal_path))
+                self._journal = None
+            return ops, list(self._sealed)
+
+    # -- store API -------------------------------------------------------------
+
+    async def create(self, db, user_id: int, ip: str, user_agent: str) -> str:
+        session_id = self.new_session_id(user_id)
+        op = {"op": "create", "id": session_id, "user_id": user_id, "ip": ip, "user_agent": user_agent, "at": time.time()}
+        with self._lock:
+            self._live[session_id] = {"user_id": user_id, "active": True, "ip": ip, "user_agent": user_agent, "created_at": op["at"]}
+        await self._record(op)
+        self.created += 1
+        return session_id
+
+    async def end(self, db, session_id: str) -> Optional[int]:
+        live = self._live.get(session_id)
+        if live is not None:
+            user_id = live["user_id"] if live["active"] else None
+        else:
+            user_id = await self.lookup(session_id)
+        if user_id is None:
+            return None
+        with self._lock:
+            self._live[session_id] = {**(live or {}), "user_id": user_id, "active": False}
+        await self._record({"op": "end", "id": session_id, "user_id": user_id, "at": time.time()})
+        self.ended += 1
+        return user_id
+
+    async def lookup(self, session_id: str, uow: Optional[UnitOfWork] = None) -> Optional[int]:
+        live = self._live.get(session_id)
+        if live is not None:
+            return live["user_id"] if live["active"] else None
+        async with db_session(uow) as db:
+            state = await run_db(db, _session_state, session_id)
+        if state is not None:
+            user_id, active = state
+            return user_id if active else None
+        # not persisted yet, possibly by another worker
+        return self.owner_of(session_id)
+
+    async def get_for_user(self, db, session_id: str, user_id: int) -> Optional[UserSession]:
+        live = self._live.get(session_id)
+        if live is not None:
+            if live["user_id"] != user_id:
+                return None
+            created_at = live.get("created_at")
+            return UserSession(
+                id=session_id, user_id=user_id, ip=live.get("ip"), user_agent=live.get("user_agent"),
+                created_at=datetime.fromtimestamp(created_at, timezone.utc) if created_at else None,
+                active=live["active"],
+            )
+        session = await run_db(db, _session_for_user, session_id, user_id)
+        if session is None and self.owner_of(session_id) == user_id:
+            session = UserSession(id=session_id, user_id=user_id, active=True)
+        return session
+
+    # -- persistence -------------------------------------------------------------
+
+    def _persist(self, ops: List[dict]) -> List[str]:
+        """
+        Apply journal ops to ``user_sessions`` in one transaction; safe to
+        repeat. Returns the ids of sessions created here that turned out to
+        be ended already (logged out on another worker first).
+        """
+        created: Dict[str, dict] = {}
+        ended: Dict[str, dict] = {}
+        for op in ops:
+            if op["op"] == "create":
+                created[op["id"]] = op
+            else:
+                ended[op["id"]] = op
+        ids = list(created.keys() | ended.keys())
+        table = UserSession.__table__
+        stale = []
+        # user_id -> (active delta, total delta, last login), see RollupRepository
+        deltas: Dict[int, list] = {}
+        with write_engine.begin() as conn:
+            existing: Dict[str, bool] = {}
+            for start in range(0, len(ids), 500):
+                rows = conn.execute(select(table.c.id, table.c.active).where(table.c.id.in_(ids[start:start + 500])))
+                existing.update((row.id, bool(row.active)) for row in rows)
+
+            rows = []
+            for session_id in ids:
+                if session_id in existing:
+                    if session_id in created and session_id not in ended and not existing[session_id]:
+                        stale.append(session_id)
+                    continue
+                create, end = created.get(session_id), ended.get(session_id)
+                source = create or end
+                rows.append({
+                    "id": session_id,
+                    "user_id": source["user_id"],
+                    "ip": create["ip"] if create else None,
+                    "user_agent": create["user_agent"] if create else None,
+                    "created_at": datetime.fromtimestamp(source["at"], timezone.utc),
+                    "ended_at": datetime.fromtimestamp(end["at"], timezone.utc) if end else None,
+                    # an end without its create: the session was opened on
+                    # another worker that has not flushed yet
+                    "active": end is None,
+                })
+                delta = deltas.setdefault(source["user_id"], [0, 0, None])
+                delta[0] += end is None
+                delta[1] += 1
+                if create:
+                    delta[2] = max(delta[2] or rows[-1]["created_at"], rows[-1]["created_at"])
+            if rows:
+                conn.execute(insert(table), rows)
+
+            end_stmt = (
+                update(table)
+                .where(table.c.id == bindparam("b_id"), table.c.active == True)
+                .values(active=False, ended_at=bindparam("b_ended_at"))
+            )
+            for session_id, op in ended.items():
+                if not existing.get(session_id):
+                    continue
+                # one at a time: only rows this call deactivates count as ended
+                result = conn.execute(end_stmt, {"b_id": session_id, "b_ended_at": datetime.fromtimestamp(op["at"], timezone.utc)})
+                if result.rowcount:
+                    deltas.setdefault(op["user_id"], [0, 0, None])[0] -= 1
+            if settings.ROLLUPS_ENABLED:
+                RollupRepository(conn).adjust_sessions({user_id: tuple(d) for user_id, d in deltas.items()})
+        return stale
+
+    def _flush(self):
+        with self._io_lock:
+            ops, sealed = self._take()
+            if not ops and not sealed:
+                return
+            try:
+                stale = self._persist(ops) if ops else []
+            except Exception:
+                traceback.print_exc()
+                self.failed += len(ops)
+                # keep the segments and retry the ops with the next flush
+                with self._lock:
+                    self._pending[:0] = ops
+                return
+            with self._lock:
+                del self._sealed[:len(sealed)]
+            for fh, path in sealed:
+                # deleted before the lock goes, so recover() can't replay it
+                path.unlink(missing_ok=True)
+                fh.close()
+            self.persisted += len(ops)
+            self.flushes += 1
+
+            with self._lock:
+                for op in ops:
+                    live = self._live.get(op["id"])
+                    # persisted: lookups can read it back, unless it changed again since
+                    if live is not None and live["active"] == (op["op"] == "create"):
+                        del self._live[op["id"]]
+                for session_id in stale:
+                    self._live.pop(session_id, None)
+            for session_id in stale:
+                self.cache.invalidate(session_id)
+            for op in ops:
+                if op["op"] == "end":
+                    invalidation_bus.publish("session", op["id"])
+
+    async def flush(self):
+        """Persist pending changes now, e.g. before rows that reference them are written."""
+        if self._pending or self._sealed:
+            await asyncio.to_thread(self._flush)
+
+    def recover(self):
+        """Replay journal segments left by workers that did not shut down cleanly. Blocking."""
+        if not self.journal_dir.is_dir():
+            return
+        for path in sorted(self.journal_dir.glob("*.jsonl")):
+            if path == self._journal_path:
+                continue
+            try:
+                with open(path, "r+", encoding="utf-8") as fh:
+                    if fcntl is not None:
+                        try:
+                            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except BlockingIOError:
+                            continue  # a live worker's segment
+                    ops = []
+                    for line in fh:
+                        try:
+                            ops.append(json.loads(line))
+                        except ValueError:
+                            break  # torn write at the tail
+                    for start in range(0, len(ops), self.batch_size):
+                        self._persist(ops[start:start + self.batch_size])
+                    path.unlink()
+                self.replayed += len(ops)
+                for op in ops:
+                    self.cache.invalidate(op["id"])
+            except Exception:
+                traceback.print_exc()
+
+    # -- lifecycle ---------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._closing = False
+        self._flush_now = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.running:
+            self._closing = True
+            self._flush_now.set()
+            await self._task
+            self._task = None
+        await asyncio.to_thread(self._flush)
+        with self._lock:
+            if self._sealed or self._pending:
+                print(f"Session store could not persist {len(self._pending)} changes; they stay in the journal", file=sys.stderr)
+                return
+            if self._journal is not None:
+                self._journal_path.unlink(missing_ok=True)
+                self._journal.close()
+                self._journal = None
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "live": len(self._live),
+            "pending": len(self._pending),
+            "segments": len(self._sealed) + (self._journal is not None),
+            "created": self.created,
+            "ended": self.ended,
+            "persisted": self.persisted,
+            "flushes": self.flushes,
+            "failed": self.failed,
+            "replayed": self.replayed,
+        }
+
+
+def create_session_store(cache: TTLCache):
+    if settings.SESSION_STORE == "database":
+        return DatabaseSessionStore(cache)
+    if settings.SESSION_STORE == "write_behind":
+        return WriteBehindSessionStore(
+            cache,
+            journal_dir=settings.SESSION_JOURNAL_DIR,
+            flush_interval_ms=settings.SESSION_STORE_FLUSH_INTERVAL_MS,
+            batch_size=settings.SESSION_STORE_BATCH_SIZE,
+            fsync=settings.SESSION_JOURNAL_FSYNC,
+            grace_seconds=settings.SESSION_STORE_GRACE_SECONDS,
+        )
+    raise ValueError(f"Unknown session store: {settings.SESSION_STORE!r}")
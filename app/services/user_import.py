@@ -0,0 +1,281 @@
+# app/services/user_import.py
+import asyncio
+import codecs
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.schemas.auth import UserCreate
+from app.utils.hashing import hash_password
+
+FORMATS = ("csv", "ndjson")
+
+# (index in the input, parsed record or the exception that stopped parsing it)
+Record = Tuple[int, Any]
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Runs in a pool process; one task per slice keeps IPC overhead low."""
+    return [hash_password(p) for p in passwords]
+
+
+def _error_detail(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc']) or 'user'}: {err['msg']}"
+            for err in exc.errors()
+        )
+    if isinstance(exc, json.JSONDecodeError):
+        return f"invalid JSON: {exc}"
+    return f"invalid row: {exc}"
+
+
+class RecordReader:
+    """
+    Incremental CSV / NDJSON parser: ``feed`` bytes as they arrive, get the
+    complete records back. CSV needs a header row (username, email,
+    password, full_name); a quoted field may span lines.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown import format: {fmt!r}")
+        self.fmt = fmt
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._tail = ""
+        self._header: Optional[List[str]] = None
+        self._index = 0
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Record]:
+        text = self._tail + self._decoder.decode(chunk, final)
+        # only "\n" ends a record: str.splitlines would also split on U+2028,
+        # U+0085 or form feeds, which may appear raw in JSON strings
+        end = len(text) if final else text.rfind("\n") + 1
+        text, self._tail = text[:end], text[end:]
+        if self.fmt == "ndjson":
+            return [self._json(line.removesuffix("\r")) for line in text.split("\n") if line.strip()]
+        return self._csv(text, final)
+
+    def _json(self, line: str) -> Record:
+        index, self._index = self._index, self._index + 1
+        try:
+            return index, json.loads(line)
+        except ValueError as exc:
+            return index, exc
+
+    def _csv(self, text: str, final: bool) -> List[Record]:
+        # keep an unterminated quoted field for the next chunk
+        if not final and text.count('"') % 2:
+            self._tail = text + self._tail
+            return []
+        records = []
+        for row in csv.reader(io.StringIO(text, newline="")):
+            if not any(field.strip() for field in row):
+                continue
+            if self._header is None:
+                self._header = [field.strip().lower() for field in row]
+                continue
+            index, self._index = self._index, self._index + 1
+            if len(row) > len(self._header):
+                records.append((index, ValueError(f"expected {len(self._header)} fields, got {len(row)}")))
+                continue
+            # empty optional fields are absent rather than ""
+            records.append((index, {k: v for k, v in zip(self._header, row) if v != ""}))
+        return records
+
+
+def iter_file_batches(path: str, fmt: str, batch_size: int) -> Iterator[List[Record]]:
+    reader = RecordReader(fmt)
+    batch: List[Record] = []
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(1 << 20)
+            batch.extend(reader.feed(chunk, final=not chunk))
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+            if not chunk:
+                break
+    if batch:
+        yield batch
+
+
+async def iter_stream_batches(stream: AsyncIterator[bytes], fmt: str, batch_size: int) -> AsyncIterator[List[Record]]:
+    reader = RecordReader(fmt)
+    batch: List[Record] = []
+    async for chunk in stream:
+        batch.extend(reader.feed(chunk))
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    batch.extend(reader.feed(b"", final=True))
+    for start in range(0, len(batch), batch_size):
+        yield batch[start:start + batch_size]
+
+
+class UserImporter:
+    """
+    Bulk user provisioning, one batch at a time:
+
+    1. validate each record as UserCreate;
+    2. reject usernames and emails already seen in the import, then look the
+       rest up with one ``IN`` query per column;
+    3. hash the passwords in a process pool, ``hash_slice`` per task;
+    4. insert in transactions of ``chunk_size`` rows. A chunk that hits a
+       unique constraint anyway (a concurrent registration) is re-checked
+       and retried without the conflicting rows.
+
+    ``run`` yields NDJSON-able events: ``error`` per rejected record,
+    ``progress`` after each batch and a final ``done``.
+    """
+
+    def __init__(self, pool: Executor, chunk_size: int = 500, hash_slice: int = 16):
+        self.pool = pool
+        self.chunk_size = chunk_size
+        self.hash_slice = hash_slice
+        self._usernames: Set[str] = set()
+        self._emails: Set[str] = set()
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self._started = time.perf_counter()
+
+    def _summary(self, event: str) -> Dict[str, Any]:
+        return {
+            "event": event,
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "elapsed_ms": round((time.perf_counter() - self._started) * 1000, 1),
+        }
+
+    def _validate(self, batch: List[Record]) -> Tuple[List[Tuple[int, UserCreate]], List[Tuple[int, str]]]:
+        parsed: List[Tuple[int, UserCreate]] = []
+        errors: List[Tuple[int, str]] = []
+        for index, record in batch:
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                parsed.append((index, UserCreate.model_validate(record)))
+            except (ValidationError, ValueError) as exc:
+                errors.append((index, _error_detail(exc)))
+        # registered ones are reported as such, also when repeated in the file;
+        # only names that will be inserted count as seen
+        taken = dict(self._taken([(index, u.username, u.email) for index, u in parsed]))
+        valid: List[Tuple[int, UserCreate]] = []
+        for index, user in parsed:
+            if index in taken:
+                errors.append((index, taken[index]))
+            elif user.username in self._usernames:
+                errors.append((index, "Username appears earlier in the import"))
+            elif user.email in self._emails:
+                errors.append((index, "Email appears earlier in the import"))
+            else:
+                self._usernames.add(user.username)
+                self._emails.add(user.email)
+                valid.append((index, user))
+        return valid, errors
+
+    def _taken(self, candidates: List[Tuple[int, str, str]]) -> List[Tuple[int, str]]:
+        """Errors for the (index, username, email) candidates that are already registered."""
+        if not candidates:
+            return []
+        db = SessionLocal()
+        try:
+            usernames = set(db.scalars(select(User.username).where(User.username.in_([c[1] for c in candidates]))))
+            emails = set(db.scalars(select(User.email).where(User.email.in_([c[2] for c in candidates]))))
+        finally:
+            db.close()
+        errors = []
+        for index, username, email in candidates:
+            if username in usernames:
+                errors.append((index, "Username already registered"))
+            elif email in emails:
+                errors.append((index, "Email already registered"))
+        return errors
+
+    async def _hash(self, users: List[UserCreate]) -> List[str]:
+        loop = asyncio.get_running_loop()
+        passwords = [u.password for u in users]
+        slices = await asyncio.gather(*(
+            loop.run_in_executor(self.pool, hash_passwords, passwords[start:start + self.hash_slice])
+            for start in range(0, len(passwords), self.hash_slice)
+        ))
+        return [hashed for part in slices for hashed in part]
+
+    def _insert(self, rows: List[Tuple[int, Dict[str, Any]]]) -> List[Tuple[int, str]]:
+        errors: List[Tuple[int, str]] = []
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            while chunk:
+                db = SessionLocal()
+                try:
+                    db.execute(insert(User), [row for _, row in chunk])
+                    db.commit()
+                    self.created += len(chunk)
+                    break
+                except IntegrityError:
+                    db.rollback()
+                    conflicts = self._taken([(index, row["username"], row["email"]) for index, row in chunk])
+                    if not conflicts:
+                        raise
+                    errors.extend(conflicts)
+                    rejected = {index for index, _ in conflicts}
+                    for index, row in chunk:
+                        if index in rejected:
+                            self._usernames.discard(row["username"])
+                            self._emails.discard(row["email"])
+                    chunk = [(index, row) for index, row in chunk if index not in rejected]
+                finally:
+                    db.close()
+        return errors
+
+    async def run(self, batches: AsyncIterator[List[Record]]) -> AsyncIterator[Dict[str, Any]]:
+        async for batch in batches:
+            valid, errors = await asyncio.to_thread(self._validate, batch)
+            if valid:
+                hashed = await self._hash([user for _, user in valid])
+                rows = [
+                    (index, {"username": u.username, "email": u.email, "full_name": u.full_name, "hashed_password": h, "is_active": True})
+                    for (index, u), h in zip(valid, hashed)
+                ]
+                errors += await asyncio.to_thread(self._insert, rows)
+            self.processed += len(batch)
+            self.failed += len(errors)
+            for index, detail in sorted(errors):
+                yield {"event": "error", "index": index, "detail": detail}
+            yield self._summary("progress")
+        yield self._summary("done")
+
+
+async def shutdown_pool(pool: Executor):
+    """Shut a hashing pool down in a thread, so the loop keeps serving; finishes even if cancelled."""
+    await asyncio.shield(asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True))
+
+
+async def import_users_file(path: str, fmt: str, batch_size: int, chunk_size: int, workers: int = 0) -> AsyncIterator[Dict[str, Any]]:
+    """Import a file with a dedicated hashing pool (the CLI); yields UserImporter.run events."""
+    pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    try:
+        importer = UserImporter(pool, chunk_size=chunk_size)
+        batches = iter_file_batches(path, fmt, batch_size)
+
+        async def read():
+            # file reads are small next to hashing; no thread needed
+            for batch in batches:
+                yield batch
+
+        async for event in importer.run(read()):
+            yield event
+    finally:
+        await shutdown_pool(pool)
@@ -0,0 +1,106 @@
+# app/utils/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    ``get`` returns ``MISSING`` (not ``None``) on a miss so that negative
+    results can be cached as ``None``.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+
+class ExpiringSet:
+    """
+    Bounded, thread-safe set whose members expire after their own ``ttl``.
+
+    Unlike TTLCache a live member is never evicted to make room: when the
+    set is full ``add`` drops the expired members and, if none were,
+    refuses the new one and returns False.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def add(self, key: Hashable, ttl: float) -> bool:
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                now = time.monotonic()
+                self._data = {k: t for k, t in self._data.items() if t > now}
+                if len(self._data) >= self.maxsize:
+                    self.rejected += 1
+                    return False
+            self._data[key] = max(expires_at, self._data.get(key, expires_at))
+            return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            expires_at = self._data.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return False
+            return True
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "rejected": self.rejected}
@@ -1,10 +1,22 @@
 # app/utils/hashing.py
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 
+from app.config import settings
+from app.utils.metrics import span
+
 # Using pbkdf2_sha256 to avoid bcrypt issues on macOS + Python 3.13
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
 
+class HashingBusyError(RuntimeError):
+    """Raised when the hashing pool is saturated and the caller should back off."""
+
+
 def hash_password(password: str) -> str:
     """Hash a plain password safely."""
     if isinstance(password, bytes):
@@ -17,3 +29,85 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     if isinstance(plain_password, bytes):
         plain_password = plain_password.decode("utf-8")
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingExecutor:
+    """
+    Runs password hashing in a process pool so that pbkdf2 neither blocks the
+    event loop nor holds the GIL of the serving process.
+
+    At most ``max_concurrency`` hashes are in flight; up to ``max_queue``
+    callers may wait ``queue_timeout`` seconds for a slot, everyone else gets
+    ``HashingBusyError`` straight away.
+    """
+
+    def __init__(self, workers: int = 0, max_concurrency: int = 0, max_queue: int = 64, queue_timeout: float = 1.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.rejected = 0
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, fn, *args):
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HashingBusyError("Password hashing queue is full")
+
+        self.waiting += 1
+        try:
+            with span("hash_queue"):
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HashingBusyError("Timed out waiting for a password hashing slot")
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            with span("hash"):
+                return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+hashing_executor = HashingExecutor(
+    workers=settings.HASH_WORKERS,
+    max_concurrency=settings.HASH_MAX_CONCURRENCY,
+    max_queue=settings.HASH_MAX_QUEUE,
+    queue_timeout=settings.HASH_QUEUE_TIMEOUT_MS / 1000.0,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_executor.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_executor.run(verify_password, plain_password, hashed_password)
@@ -1,16 +1,52 @@
 # app/utils/jwt_utils.py
+import hashlib
+import sys
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 from jose import jwt, JWTError
 
 from app.config import settings
 from app.schemas.auth import TokenData
+from app.services.invalidation_bus import invalidation_bus
+from app.utils.cache import ExpiringSet, TTLCache, MISSING
+from app.utils.metrics import span
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+# sha256(token) -> (TokenData, exp) for tokens that passed verification.
+# Each entry is evicted at the token's own exp.
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+# sha256(token) of revoked tokens, kept until they would have expired anyway.
+# Never evicted early: once full, further revocations are refused.
+revoked_tokens = ExpiringSet(maxsize=settings.TOKEN_REVOCATION_SIZE)
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _revoke_digest(digest: bytes, ttl: float) -> bool:
+    token_cache.invalidate(digest)
+    return ttl <= 0 or revoked_tokens.add(digest, ttl)
+
+
+def _revoked_elsewhere(key: str):
+    digest, _, expires_at = key.partition(":")
+    if not _revoke_digest(bytes.fromhex(digest), float(expires_at) - time.time()):
+        print("Token revocation list is full; a token revoked by another worker stays valid here", file=sys.stderr)
+
+
+invalidation_bus.subscribe("token", _revoked_elsewhere)
+
+
+def _not_expired(exp: int) -> bool:
+    # python-jose compares exp against the current time truncated to seconds
+    return exp >= int(time.time())
+
 
 def create_access_token(data: Dict[str, Any],
                         expires_delta: Optional[timedelta] = None) -> str:
@@ -23,9 +59,52 @@ def create_access_token(data: Dict[str, Any],
     return encoded_jwt
 
 
-def decode_access_token(token: str) -> TokenData:
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+def _verify(token: str, digest: bytes) -> Tuple[TokenData, Optional[int]]:
+    cached = token_cache.get(digest)
+    if cached is not MISSING:
+        token_data, exp = cached
+        if _not_expired(exp):
+            return token_data, exp
+        token_cache.invalidate(digest)
+
+    with span("jwt"):
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     username: Optional[str] = payload.get("sub")
     if username is None:
         raise JWTError("Token has no subject")
-    return TokenData(username=username)
+    if digest in revoked_tokens:
+        raise JWTError("Token has been revoked")
+
+    token_data = TokenData(
+        username=username,
+        user_id=payload.get("uid"),
+        email=payload.get("email"),
+        full_name=payload.get("name"),
+        is_active=payload.get("active"),
+    )
+    exp = payload.get("exp")
+    if isinstance(exp, int):
+        token_cache.set(digest, (token_data, exp), ttl=exp + 1 - time.time())
+    return token_data, exp
+
+
+def decode_access_token(token: str) -> TokenData:
+    return _verify(token, _digest(token))[0]
+
+
+def revoke_token(token: str) -> bool:
+    """
+    Reject ``token`` from now on (until it expires) and drop it from the cache.
+    Tokens that don't verify (bad signature, expired, already revoked) are
+    ignored. Returns False when the revocation list is full.
+    """
+    digest = _digest(token)
+    try:
+        _, exp = _verify(token, digest)
+    except JWTError:
+        return True
+    ttl = exp + 1 - time.time() if isinstance(exp, int) else ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    if not _revoke_digest(digest, ttl):
+        return False
+    invalidation_bus.publish("token", f"{digest.hex()}:{time.time() + ttl:.0f}")
+    return True
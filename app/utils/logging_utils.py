@@ -1,13 +1,15 @@
 # app/utils/logging_utils.py
+import csv
+import gzip
 from pathlib import Path
 from fastapi import Request
-from openpyxl import Workbook, load_workbook
-from typing import List
+from typing import BinaryIO, Iterator, List, Optional
 import os
 
 LOG_BASE = Path("logs")
 SESSION_DIR = LOG_BASE / "sessions"
-SESSION_DIR.mkdir(parents=True, exist_ok=True)
+
+SESSION_LOG_HEADER = ["timestamp", "method", "path", "status", "ip", "user_agent", "extra"]
 
 def ensure_session_folder():
     SESSION_DIR.mkdir(parents=True, exist_ok=True)
@@ -23,25 +25,72 @@ def get_client_ip(request: Request) -> str:
     return "unknown"
 
 def session_log_path(session_id: str, ext: str = "txt") -> Path:
-    ensure_session_folder()
-    filename = f"session_{session_id}.{ext}"
-    return SESSION_DIR / filename
+    """Sharded by the first two characters of the id to keep directories small."""
+    return SESSION_DIR / session_id[:2] / f"session_{session_id}.{ext}"
+
+def find_session_log(session_id: str, ext: str = "csv") -> Optional[Path]:
+    """The session's log file: live, rotated (.gz), or from before sharding."""
+    p = session_log_path(session_id, ext)
+    for candidate in (p, p.with_name(p.name + ".gz"), SESSION_DIR / p.name):
+        if candidate.exists():
+            return candidate
+    return None
 
 def append_text_log(session_id: str, line: str):
+    """Unbuffered append; request handling goes through session_log_writer."""
     p = session_log_path(session_id, "txt")
+    p.parent.mkdir(parents=True, exist_ok=True)
     with open(p, "a", encoding="utf-8") as fh:
         fh.write(line + "\n")
 
-def append_xlsx_log(session_id: str, row: List):
-    p = session_log_path(session_id, "xlsx")
-    if not p.exists():
-        wb = Workbook()
-        ws = wb.active
-        ws.append(["timestamp", "method", "path", "status", "ip", "user_agent", "extra"])
-        ws.append(row)
-        wb.save(p)
-    else:
-        wb = load_workbook(p)
-        ws = wb.active
+def append_csv_log(session_id: str, row: List):
+    """Append one activity row to the session's CSV log (constant cost per call)."""
+    p = session_log_path(session_id, "csv")
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with open(p, "a", encoding="utf-8", newline="") as fh:
+        writer = csv.writer(fh)
+        if fh.tell() == 0:
+            writer.writerow(SESSION_LOG_HEADER)
+        writer.writerow(row)
+
+def iter_session_rows(session_id: str) -> Iterator[List]:
+    p = find_session_log(session_id, "csv")
+    if p is None:
+        return
+    opener = gzip.open if p.suffix == ".gz" else open
+    with opener(p, "rt", encoding="utf-8", newline="") as fh:
+        reader = csv.reader(fh)
+        for row in reader:
+            if row == SESSION_LOG_HEADER:
+                # first line, and again after each rotation of a reopened session
+                continue
+            if len(row) > 3 and row[3].isdigit():
+                row[3] = int(row[3])
+            yield row
+
+def has_session_log(session_id: str) -> bool:
+    return find_session_log(session_id, "csv") is not None or (SESSION_DIR / f"session_{session_id}.xlsx").exists()
+
+def export_session_xlsx(session_id: str, dest: BinaryIO):
+    """
+    Render the session's activity log as .xlsx into ``dest``.
+
+    Rows are streamed through openpyxl's write-only mode, so memory stays flat
+    regardless of session length. Sessions recorded before the CSV log existed
+    only have a legacy .xlsx file, which is copied as is.
+    """
+    legacy_path = SESSION_DIR / f"session_{session_id}.xlsx"
+    if find_session_log(session_id, "csv") is None and legacy_path.exists():
+        with open(legacy_path, "rb") as fh:
+            while chunk := fh.read(64 * 1024):
+                dest.write(chunk)
+        return
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(SESSION_LOG_HEADER)
+    for row in iter_session_rows(session_id):
         ws.append(row)
-        wb.save(p)
+    wb.save(dest)
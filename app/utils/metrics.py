@@ -0,0 +1,267 @@
+# app/utils/metrics.py
+"""
+Lightweight in-process instrumentation.
+
+* ``span(name)`` times a stage of request handling (JWT decode, hashing, ...)
+* SQLAlchemy engine hooks count and time every query and count the pool
+  checkouts made for each request
+* ``MetricsMiddleware`` records per-route latency and, optionally, emits a
+  ``Server-Timing`` header built from the spans of the current request
+* ``render_prometheus()`` exposes everything in the Prometheus text format
+
+Nothing is collected unless METRICS_ENABLED or SERVER_TIMING_ENABLED is set:
+``span`` then returns a shared no-op context manager, and neither the engine
+hooks nor the middleware are installed.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+METRICS_ENABLED = settings.METRICS_ENABLED
+SERVER_TIMING_ENABLED = settings.SERVER_TIMING_ENABLED
+ENABLED = METRICS_ENABLED or SERVER_TIMING_ENABLED
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+# per-request timings: {"spans": {name: seconds}, "db_queries": int, "db_seconds": float, "db_connections": int}
+_request_timings: ContextVar[Optional[dict]] = ContextVar("request_timings", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(data)) for labels, data in self._values.items())
+        for labels, data in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {data[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {data[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {data[-1]}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from a callback returning {label value: number} or a number."""
+
+    def __init__(self, name: str, help: str, fn: Callable, labelname: Optional[str] = None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelname = labelname
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        value = self.fn()
+        if isinstance(value, dict):
+            for label, v in sorted(value.items()):
+                lines.append(f'{self.name}{{{self.labelname}="{_escape(label)}"}} {v}')
+        else:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+_registry: Dict[str, object] = {}
+
+
+def _register(metric):
+    return _registry.setdefault(metric.name, metric)
+
+
+def register_gauge(name: str, help: str, fn: Callable, labelname: Optional[str] = None):
+    _register(Gauge(name, help, fn, labelname))
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in _registry.values():
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+request_latency = _register(Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route", "status"),
+))
+request_db_queries = _register(Histogram(
+    "http_request_db_queries", "Database queries issued per request", ("route",), COUNT_BUCKETS,
+))
+request_db_connections = _register(Histogram(
+    "http_request_db_connections", "Pool connections checked out per request", ("route",), COUNT_BUCKETS,
+))
+span_latency = _register(Histogram("app_span_duration_seconds", "Time spent in instrumented stages", ("span",)))
+db_query_latency = _register(Histogram("db_query_duration_seconds", "Database query latency"))
+db_queries_total = _register(Counter("db_queries_total", "Database queries executed"))
+db_checkouts_total = _register(Counter("db_pool_checkouts_total", "Connections checked out of the pools"))
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        span_latency.observe(elapsed, self.name)
+        timings = _request_timings.get()
+        if timings is not None:
+            spans = timings["spans"]
+            spans[self.name] = spans.get(self.name, 0.0) + elapsed
+        return False
+
+
+_NULL_SPAN = nullcontext()
+
+
+def span(name: str):
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_query_latency.observe(elapsed)
+    db_queries_total.inc()
+    timings = _request_timings.get()
+    if timings is not None:
+        timings["db_queries"] += 1
+        timings["db_seconds"] += elapsed
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    db_checkouts_total.inc()
+    timings = _request_timings.get()
+    if timings is not None:
+        timings["db_connections"] += 1
+
+
+def install_db_hooks(*engines):
+    if not ENABLED:
+        return
+    from sqlalchemy import event
+
+    for eng in engines:
+        eng = getattr(eng, "sync_engine", eng)
+        if not event.contains(eng, "before_cursor_execute", _before_cursor_execute):
+            event.listen(eng, "before_cursor_execute", _before_cursor_execute)
+            event.listen(eng, "after_cursor_execute", _after_cursor_execute)
+            event.listen(eng, "checkout", _checkout)
+
+
+def _server_timing(timings: dict, total: float) -> bytes:
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings["spans"].items()]
+    if timings["db_queries"]:
+        parts.append(
+            f'db;dur={timings["db_seconds"] * 1000:.2f};'
+            f'desc="{timings["db_queries"]} queries, {timings["db_connections"]} connections"'
+        )
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency, DB queries per request, Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {"spans": {}, "db_queries": 0, "db_seconds": 0.0, "db_connections": 0}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(timings, time.perf_counter() - start)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            if METRICS_ENABLED:
+                route = scope.get("route")
+                route_name = getattr(route, "path", None) or "unmatched"
+                request_latency.observe(time.perf_counter() - start, scope["method"], route_name, str(status_code))
+                request_db_queries.observe(timings["db_queries"], route_name)
+                request_db_connections.observe(timings["db_connections"], route_name)
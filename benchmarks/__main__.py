@@ -0,0 +1,124 @@
+# benchmarks/__main__.py
+"""
+Benchmark suite.
+
+    python -m benchmarks run --scale users=10,items=1000,sessions=2 --out results.json
+    python -m benchmarks compare baseline.json results.json --threshold 0.2
+
+``run`` seeds a temporary SQLite database, runs the micro-benchmarks, the
+serialization comparison (10, 1k and 100k items) and the macro scenarios in-process and writes p50/p95/p99 latency and throughput to
+JSON. ``compare`` exits non-zero when a result regressed past the threshold
+against the baseline.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+
+from benchmarks.harness import Scale, prepare_environment
+
+PASSWORD = "bench-password"
+# (metric, True when larger is better)
+COMPARE_METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "ops_per_s": True}
+
+
+def cmd_run(args) -> int:
+    workdir = prepare_environment()
+    scale = Scale.parse(args.scale)
+
+    from benchmarks import harness, macro, micro, serialization
+
+    usernames = harness.seed(scale, PASSWORD)
+    results = {}
+    if args.suite in ("all", "micro"):
+        results.update({f"micro.{k}": v for k, v in micro.run(usernames, args.iterations).items()})
+    if args.suite in ("all", "serialization"):
+        results.update({f"serialization.{k}": v for k, v in serialization.run(args.iterations).items()})
+    if args.suite in ("all", "macro"):
+        results.update({
+            f"macro.{k}": v
+            for k, v in asyncio.run(macro.run(usernames, args.requests, args.concurrency, PASSWORD)).items()
+        })
+
+    report = {
+        "meta": {
+            "scale": vars(scale),
+            "iterations": args.iterations,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "workdir": workdir,
+        },
+        "results": results,
+    }
+    print(f"{'benchmark':<40} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for name, r in results.items():
+        print(f"{name:<40} {r['n']:>6} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['ops_per_s']:>10.1f}")
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Wrote {args.out}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)["results"]
+    with open(args.current) as fh:
+        current = json.load(fh)["results"]
+    metrics = args.metrics.split(",")
+
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        if name not in current:
+            print(f"{name:<40} missing from current results")
+            continue
+        for metric in metrics:
+            before, after = base[metric], current[name][metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            worse = -change if COMPARE_METRICS[metric] else change
+            flag = "REGRESSED" if worse > args.threshold else ""
+            print(f"{name:<40} {metric:<10} {before:>10.3f} -> {after:>10.3f} {change:>+8.1%} {flag}")
+            if flag:
+                regressions.append((name, metric))
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="run the suite and write results")
+    p.add_argument("--scale", default="users=10,items=100,sessions=2", help="users=N,items=N,sessions=N")
+    p.add_argument("--suite", choices=("all", "micro", "serialization", "macro"), default="all")
+    p.add_argument("--iterations", type=int, default=500, help="iterations per micro-benchmark")
+    p.add_argument("--requests", type=int, default=500, help="requests per macro scenario")
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--out", help="write JSON results to this path")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("compare", help="fail when results regressed against a baseline")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown (default 0.2)")
+    p.add_argument("--metrics", default="p50_ms,p95_ms,ops_per_s",
+                   help=f"comma-separated, any of {','.join(COMPARE_METRICS)}")
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
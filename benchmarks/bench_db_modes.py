@@ -0,0 +1,118 @@
+# benchmarks/bench_db_modes.py
+"""
+Side-by-side benchmark of the sync (threadpool) and async (AsyncEngine)
+database paths.
+
+Each mode runs in its own interpreter, because the mode is fixed when
+app.database is imported, against a fresh temporary SQLite database:
+
+    python benchmarks/bench_db_modes.py --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    k = max(0, min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+async def run_worker(args):
+    import httpx
+
+    from app.database import SessionLocal, init_schema
+    from app.main import app
+    from app.models.item import Item
+    from app.models.user import User
+    from app.utils.hashing import hash_password
+    from app.utils.jwt_utils import create_access_token
+
+    init_schema()
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password=hash_password("bench"))
+    db.add(user)
+    db.commit()
+    db.add_all(Item(title=f"item {i}", description="bench", owner_id=user.id) for i in range(args.items))
+    db.commit()
+    db.close()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one():
+                async with semaphore:
+                    start = time.perf_counter()
+                    r = await client.get(f"/items/?limit={args.page}", headers=headers)
+                    latencies.append(time.perf_counter() - start)
+                    assert r.status_code == 200, r.text
+
+            await one()  # warm-up
+            latencies.clear()
+            started = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(args.requests)))
+            elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        "requests": args.requests,
+        "rps": args.requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }))
+
+
+def run_mode(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.update(
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            DB_ASYNC="1" if mode == "async" else "0",
+            PYTHONPATH=ROOT,
+        )
+        cmd = [
+            sys.executable, os.path.abspath(__file__), "--worker",
+            "--requests", str(args.requests),
+            "--concurrency", str(args.concurrency),
+            "--items", str(args.items),
+            "--page", str(args.page),
+        ]
+        out = subprocess.run(cmd, env=env, cwd=tmp, check=True, capture_output=True, text=True).stdout
+        return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(run_worker(args))
+        return
+
+    print(f"GET /items/?limit={args.page}  requests={args.requests} concurrency={args.concurrency}")
+    print(f"{'mode':<6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for mode in ("sync", "async"):
+        r = run_mode(mode, args)
+        print(f"{mode:<6} {r['rps']:>9.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/harness.py
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Scale:
+    users: int = 10
+    items: int = 100      # per user
+    sessions: int = 2     # per user
+
+    @classmethod
+    def parse(cls, spec: str) -> "Scale":
+        """Parse ``users=10,items=100,sessions=2``."""
+        scale = cls()
+        for part in filter(None, spec.split(",")):
+            key, _, value = part.partition("=")
+            if not hasattr(scale, key.strip()):
+                raise ValueError(f"Unknown scale dimension: {key!r}")
+            setattr(scale, key.strip(), int(value))
+        return scale
+
+
+def prepare_environment() -> str:
+    """
+    Point the app at a fresh temporary SQLite database and log directory.
+
+    Must run before anything under ``app`` is imported: settings and engines
+    are built at import time.
+    """
+    if "app.config" in sys.modules:
+        raise RuntimeError("prepare_environment() must run before the app is imported")
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    # the login storm comes from one client address; measure the server, not the throttle
+    os.environ.setdefault("LOGIN_RATE_PER_MINUTE", "0")
+    # the middleware scenarios request "/", which the app skips by default
+    os.environ.setdefault("LOG_SKIP_PATHS", "")
+    os.chdir(workdir)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    return workdir
+
+
+def seed(scale: Scale, password: str = "bench-password") -> List[str]:
+    """Create users x items x sessions; every user shares ``password``. Returns usernames."""
+    import uuid
+
+    from sqlalchemy import insert
+
+    from app.database import SessionLocal, create_schema
+    from app.models.item import Item
+    from app.models.logs import UserSession
+    from app.models.user import User
+    from app.utils.hashing import hash_password
+
+    create_schema()
+    hashed = hash_password(password)
+    usernames = [f"user{i}" for i in range(scale.users)]
+    db = SessionLocal()
+    try:
+        user_ids = db.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [{"username": u, "email": f"{u}@example.com", "hashed_password": hashed} for u in usernames],
+        ).all()
+        for user_id in user_ids:
+            if scale.items:
+                db.execute(insert(Item), [
+                    {"title": f"item {n}", "description": "seeded", "owner_id": user_id}
+                    for n in range(scale.items)
+                ])
+            if scale.sessions:
+                db.execute(insert(UserSession), [
+                    {"id": uuid.uuid4().hex, "user_id": user_id, "ip": "127.0.0.1", "user_agent": "bench"}
+                    for _ in range(scale.sessions)
+                ])
+        db.commit()
+    finally:
+        db.close()
+    return usernames
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "n": len(values),
+        "p50_ms": statistics.median(values) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "ops_per_s": len(values) / elapsed if elapsed else 0.0,
+    }
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 3) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def measure_async(
+    fn: Callable[[int], Awaitable[object]],
+    requests: int,
+    concurrency: int,
+    warmup: int = 5,
+) -> Dict[str, float]:
+    """Run ``fn(i)`` ``requests`` times with at most ``concurrency`` in flight."""
+    for i in range(warmup):
+        await fn(i)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            t0 = time.perf_counter()
+            await fn(i)
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, time.perf_counter() - started)
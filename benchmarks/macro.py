@@ -0,0 +1,67 @@
+# benchmarks/macro.py
+"""Macro scenarios: the ASGI app in-process over httpx's ASGI transport."""
+import random
+from typing import Dict, List
+
+
+async def run(usernames: List[str], requests: int, concurrency: int, password: str) -> Dict[str, Dict[str, float]]:
+    import httpx
+
+    from app.main import app
+    from app.utils.jwt_utils import create_access_token
+
+    from benchmarks.harness import measure_async
+
+    results = {}
+    rng = random.Random(0)
+    tokens = {u: create_access_token({"sub": u}) for u in usernames}
+
+    def auth(username):
+        return {"Authorization": f"Bearer {tokens[username]}"}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+            async def health(i):
+                r = await client.get("/")
+                assert r.status_code == 200, r.text
+
+            # the cheapest route: what is left is mostly middleware overhead
+            results["middleware_overhead"] = await measure_async(health, requests, concurrency)
+
+            login_response = await client.post("/auth/login", data={"username": usernames[0], "password": password})
+            session_cookie = {"session_id": login_response.cookies["session_id"]}
+
+            async def health_with_session(i):
+                r = await client.get("/", cookies=session_cookie)
+                assert r.status_code == 200, r.text
+
+            results["middleware_overhead_session"] = await measure_async(health_with_session, requests, concurrency)
+
+            async def read_items(i):
+                r = await client.get("/items/?limit=50", headers=auth(rng.choice(usernames)))
+                assert r.status_code == 200, r.text
+
+            results["items_read"] = await measure_async(read_items, requests, concurrency)
+
+            async def read_item(i):
+                r = await client.get("/items/1", headers=auth(usernames[0]))
+                assert r.status_code in (200, 404), r.text
+
+            results["item_read_single"] = await measure_async(read_item, requests, concurrency)
+
+            async def create_item(i):
+                r = await client.post("/items/", json={"title": f"burst {i}"}, headers=auth(rng.choice(usernames)))
+                assert r.status_code == 201, r.text
+
+            results["item_create_burst"] = await measure_async(create_item, requests, concurrency)
+
+            async def login(i):
+                r = await client.post("/auth/login", data={"username": rng.choice(usernames), "password": password})
+                # 503 is the hashing pool shedding load, which is a valid outcome
+                assert r.status_code in (200, 503), r.text
+
+            results["login_storm"] = await measure_async(login, max(10, requests // 10), concurrency)
+
+    return results
@@ -0,0 +1,47 @@
+# benchmarks/micro.py
+"""Micro-benchmarks: single functions on the hot path, called directly."""
+import io
+import itertools
+from typing import Dict, List
+
+
+def run(usernames: List[str], iterations: int) -> Dict[str, Dict[str, float]]:
+    from app.database import SessionLocal
+    from app.repositories.item_repository import ItemRepository
+    from app.repositories.user_repository import UserRepository
+    from app.utils.hashing import hash_password, verify_password
+    from app.utils.jwt_utils import create_access_token, decode_access_token
+    from app.services.session_log_writer import SessionLogWriter
+    from app.utils.logging_utils import append_csv_log, export_session_xlsx
+
+    from benchmarks.harness import measure
+
+    results = {}
+    # pbkdf2 is deliberately slow; a handful of rounds is enough
+    hash_rounds = max(5, iterations // 50)
+    hashed = hash_password("bench-password")
+    results["hash_password"] = measure(lambda: hash_password("bench-password"), hash_rounds, warmup=1)
+    results["verify_password"] = measure(lambda: verify_password("bench-password", hashed), hash_rounds, warmup=1)
+
+    token = create_access_token({"sub": usernames[0]})
+    results["create_access_token"] = measure(lambda: create_access_token({"sub": usernames[0]}), iterations)
+    results["decode_access_token"] = measure(lambda: decode_access_token(token), iterations)
+
+    db = SessionLocal()
+    try:
+        owner_id = UserRepository(db).get_by_username(usernames[0]).id
+        repo = ItemRepository(db)
+        results["list_for_user"] = measure(lambda: repo.list_for_user(owner_id), max(10, iterations // 10))
+        results["list_for_user_page50"] = measure(lambda: repo.list_for_user(owner_id, limit=50), iterations)
+    finally:
+        db.close()
+
+    # session activity log (replaced the per-request append_xlsx_log)
+    row = ["2024-01-01T00:00:00", "GET", "/items/", 200, "127.0.0.1", "bench", ""]
+    results["append_session_row"] = measure(lambda: append_csv_log("bench", row), iterations)
+    # what the middleware does per request; flushes inline every 64 KiB here
+    writer = SessionLogWriter(compress=False)
+    results["buffer_session_row"] = measure(lambda: writer.append("bench", "bench line " * 8, row), iterations)
+    writer.close()
+    results["export_session_xlsx"] = measure(lambda: export_session_xlsx("bench", io.BytesIO()), 5, warmup=1)
+    return results
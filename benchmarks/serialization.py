@@ -0,0 +1,59 @@
+# benchmarks/serialization.py
+"""
+GET /items serialization: the ORM + response_model path against the
+column-select + TypeAdapter.dump_json fast path, at several list sizes.
+"""
+import json
+from typing import Dict, List, Sequence
+
+SIZES = (10, 1000, 100000)
+
+
+def run(iterations: int, sizes: Sequence[int] = SIZES) -> Dict[str, Dict[str, float]]:
+    from pydantic import TypeAdapter
+    from sqlalchemy import insert
+
+    from app.database import SessionLocal
+    from app.models.item import Item
+    from app.models.user import User
+    from app.repositories.item_repository import ItemRepository
+    from app.schemas.item import ItemRead, item_rows_adapter
+
+    from benchmarks.harness import measure
+
+    # what FastAPI does with response_model=List[ItemRead]: validate the
+    # returned models again, dump them to Python, then json.dumps
+    response_model = TypeAdapter(List[ItemRead])
+
+    def response_model_path(repo, owner_id):
+        items = [ItemRead.model_validate(i) for i in repo.list_for_user(owner_id)]
+        validated = response_model.validate_python(items, from_attributes=True)
+        return json.dumps(response_model.dump_python(validated, mode="json")).encode()
+
+    def fast_path(repo, owner_id):
+        return item_rows_adapter.dump_json(repo.list_rows_for_user(owner_id))
+
+    results = {}
+    db = SessionLocal()
+    try:
+        for size in sizes:
+            owner_id = db.scalars(
+                insert(User).returning(User.id),
+                [{"username": f"ser{size}", "email": f"ser{size}@example.com", "hashed_password": "-"}],
+            ).one()
+            db.execute(insert(Item), [
+                {"title": f"item {n}", "description": "serialization", "owner_id": owner_id} for n in range(size)
+            ])
+            db.commit()
+
+            repo = ItemRepository(db)
+            assert json.loads(response_model_path(repo, owner_id)) == json.loads(fast_path(repo, owner_id))
+            rounds = max(3, min(iterations, 100000 // size))
+            warmup = 1 if size >= 100000 else 3
+            results[f"items_{size}_response_model"] = measure(
+                lambda: (response_model_path(repo, owner_id), db.expunge_all()), rounds, warmup=warmup,
+            )
+            results[f"items_{size}_rows_dump_json"] = measure(lambda: fast_path(repo, owner_id), rounds, warmup=warmup)
+    finally:
+        db.close()
+    return results
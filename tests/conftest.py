@@ -0,0 +1,51 @@
+# tests/conftest.py
+import os
+import tempfile
+import uuid
+
+# app.database builds its engines at import time
+_tmp = tempfile.mkdtemp(prefix="app-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+# every test logs in from the same client address
+os.environ["LOGIN_RATE_PER_MINUTE"] = "0"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.database import init_schema  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    init_schema()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The app with its lifespan running; log files go under tmp_path."""
+    from app.main import app
+
+    monkeypatch.chdir(tmp_path)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def new_user(client):
+    """Registers and logs in a new user; returns its Authorization header."""
+
+    def new_user() -> dict:
+        name = f"u{uuid.uuid4().hex[:12]}"
+        r = client.post("/auth/register", json={"username": name, "email": f"{name}@example.com", "password": "pw"})
+        assert r.status_code == 201, r.text
+        r = client.post("/auth/login", data={"username": name, "password": "pw"})
+        assert r.status_code == 200, r.text
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    return new_user
+
+
+@pytest.fixture
+def auth_headers(new_user):
+    return new_user()
@@ -0,0 +1,117 @@
+# tests/db_profile_scenario.py
+"""
+Bulk item create, ETag revalidation, search, user import, session activity
+and logout against the app, under whatever DB_PROFILE and DB_ASYNC the
+environment sets. The engines are built at import time, so
+test_db_profiles.py runs this in a fresh interpreter per profile:
+
+    python -m tests.db_profile_scenario
+
+Exits non-zero when a request fails, a write reached a read-pool connection
+or a request read the schema through the writer.
+"""
+import asyncio
+import json
+import sys
+
+import httpx
+from sqlalchemy import event
+
+from app.database import async_engine, async_write_engine, engine, write_engine
+from app.main import app
+from app.services.access_log_writer import access_log_writer
+
+WRITES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP")
+
+writes_on_readers = []
+schema_reads_on_writer = []
+
+
+def _record_writes(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith(WRITES):
+        writes_on_readers.append(statement)
+
+
+def _record_schema_reads(conn, cursor, statement, parameters, context, executemany):
+    if "sqlite_master" in statement:
+        schema_reads_on_writer.append(statement)
+
+
+def _readers():
+    readers = []
+    if write_engine is not engine:
+        readers.append(engine)
+    if async_engine is not None and async_write_engine is not async_engine:
+        readers.append(async_engine.sync_engine)
+    return readers
+
+
+def check(condition: bool, what: str, response: httpx.Response):
+    if not condition:
+        raise AssertionError(f"{what}: {response.status_code} {response.text[:500]}")
+
+
+async def scenario(client: httpx.AsyncClient):
+    r = await client.post("/auth/register", json={"username": "admin", "email": "admin@example.com", "password": "pw"})
+    check(r.status_code == 201, "register", r)
+    r = await client.post("/auth/login", data={"username": "admin", "password": "pw"})
+    check(r.status_code == 200, "login", r)
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    session_id = r.cookies["session_id"]
+
+    r = await client.post("/items/bulk?chunk_size=2", json=[{"title": f"b{i}"} for i in range(5)], headers=headers)
+    check(r.status_code == 201 and len(r.json()["created_ids"]) == 5, "bulk create", r)
+    r = await client.get("/items/", headers=headers)
+    check(r.status_code == 200 and len(r.json()) == 5, "list", r)
+    etag = r.headers["etag"]
+    r = await client.get("/items/", headers={**headers, "If-None-Match": etag})
+    check(r.status_code == 304, "revalidate", r)
+    r = await client.post("/items/", json={"title": "one"}, headers=headers)
+    check(r.status_code == 201, "create", r)
+    r = await client.get("/items/", headers={**headers, "If-None-Match": etag})
+    check(r.status_code == 200 and len(r.json()) == 6, "list after write", r)
+    r = await client.get("/items/search", params={"q": "b", "limit": 2}, headers=headers)
+    check(r.status_code == 200 and len(r.json()) == 2 and r.headers.get("x-next-after"), "search", r)
+
+    body = "username,email,password\n" + "".join(f"imp{i},imp{i}@example.com,pw\n" for i in range(20))
+    r = await client.post("/admin/users/import", content=body, headers={**headers, "Content-Type": "text/csv"})
+    done = json.loads(r.text.splitlines()[-1]) if r.status_code == 200 else {}
+    check(done.get("event") == "done" and done.get("created") == 20, "import", r)
+    r = await client.post("/auth/login", data={"username": "imp7", "password": "pw"})
+    check(r.status_code == 200, "login imported user", r)
+
+    # today's partition is created with the access log writer's first batch
+    for _ in range(100):
+        if access_log_writer.written:
+            break
+        await asyncio.sleep(0.05)
+    if write_engine is not engine:
+        event.listen(write_engine, "before_cursor_execute", _record_schema_reads)
+    r = await client.get(f"/auth/sessions/{session_id}/activity", headers=headers)
+    check(r.status_code == 200 and r.json(), "activity", r)
+
+    r = await client.post("/auth/logout", headers=headers)
+    check(r.status_code == 200, "logout", r)
+    r = await client.get("/items/", headers=headers)
+    check(r.status_code == 401, "revoked token", r)
+
+
+async def main():
+    for reader in _readers():
+        event.listen(reader, "before_cursor_execute", _record_writes)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await scenario(client)
+    if writes_on_readers:
+        raise AssertionError(f"writes sent to a read-pool connection: {writes_on_readers[:5]}")
+    if schema_reads_on_writer:
+        raise AssertionError(f"schema read through the writer: {schema_reads_on_writer[:5]}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except AssertionError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,29 @@
+# tests/test_db_profiles.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("profile", ["default", "performance"])
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_scenario_under_each_profile(tmp_path, profile, use_async):
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "DATABASE_URL": f"sqlite:///{tmp_path}/app.db",
+        "DB_PROFILE": profile,
+        "DB_ASYNC": str(use_async).lower(),
+        "ADMIN_USERNAMES": "admin",
+        # a write waiting on a misrouted one fails fast instead of after 5s
+        "SQLITE_BUSY_TIMEOUT_MS": "500",
+    }
+    result = subprocess.run(
+        [sys.executable, "-m", "tests.db_profile_scenario"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-4000:]
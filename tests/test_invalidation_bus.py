@@ -0,0 +1,48 @@
+# tests/test_invalidation_bus.py
+from sqlalchemy import func, select
+
+from app.database import engine
+from app.models.invalidation import CacheInvalidation
+from app.services.invalidation_bus import InvalidationBus
+
+
+def _bus(received=None, retention_seconds=300.0):
+    bus = InvalidationBus(enabled=True, retention_seconds=retention_seconds)
+    if received is not None:
+        bus.subscribe("session", received.append)
+    return bus
+
+
+def test_events_after_a_full_prune_still_reach_other_workers():
+    received = []
+    publisher, subscriber = _bus(retention_seconds=0), _bus(received)
+    subscriber._poll()  # starts from the current tail
+
+    publisher.publish("session", "a")
+    publisher._flush()
+    subscriber._poll()
+    assert received == ["a"]
+
+    # everything is past retention; the newest row must survive
+    publisher._prune()
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(CacheInvalidation)).scalar_one() == 1
+
+    publisher.publish("session", "b")
+    publisher._flush()
+    subscriber._poll()
+    assert received == ["a", "b"]
+
+
+def test_ids_are_not_reused():
+    publisher = _bus(retention_seconds=0)
+    publisher.publish("session", "x")
+    publisher._flush()
+    with engine.connect() as conn:
+        before = conn.execute(select(func.max(CacheInvalidation.id))).scalar_one()
+        conn.execute(CacheInvalidation.__table__.delete())
+        conn.commit()
+    publisher.publish("session", "y")
+    publisher._flush()
+    with engine.connect() as conn:
+        assert conn.execute(select(func.max(CacheInvalidation.id))).scalar_one() > before
@@ -0,0 +1,51 @@
+# tests/test_item_etags.py
+from app.database import SessionLocal
+from app.repositories.item_repository import ItemRepository
+from app.schemas.item import ItemCreate
+
+
+def test_list_revalidates_until_a_write(client, auth_headers):
+    client.post("/items/", json={"title": "first"}, headers=auth_headers)
+    r = client.get("/items/", headers=auth_headers)
+    etag = r.headers["etag"]
+    assert [i["title"] for i in r.json()] == ["first"]
+
+    r = client.get("/items/", headers={**auth_headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+    client.post("/items/", json={"title": "second"}, headers=auth_headers)
+    r = client.get("/items/", headers={**auth_headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert [i["title"] for i in r.json()] == ["first", "second"]
+
+
+def test_bulk_create_changes_item_etags(client, auth_headers):
+    item_id = client.post("/items/", json={"title": "one"}, headers=auth_headers).json()["id"]
+    etag = client.get(f"/items/{item_id}", headers=auth_headers).headers["etag"]
+    assert client.get(f"/items/{item_id}", headers={**auth_headers, "If-None-Match": f'W/{etag}'}).status_code == 304
+
+    r = client.post("/items/bulk", json=[{"title": "two"}, {"title": "three"}], headers=auth_headers)
+    assert r.status_code == 201
+    assert client.get(f"/items/{item_id}", headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+
+
+def test_write_from_another_worker_changes_the_etag(client, auth_headers):
+    owner_id = client.post("/items/", json={"title": "mine"}, headers=auth_headers).json()["owner_id"]
+    r = client.get("/items/", headers=auth_headers)
+    etag, body = r.headers["etag"], r.json()
+
+    # straight to the database, as another process would
+    with SessionLocal() as db:
+        ItemRepository(db).create_for_user(owner_id, ItemCreate(title="elsewhere"))
+
+    r = client.get("/items/", headers={**auth_headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert len(r.json()) == len(body) + 1
+
+
+def test_etags_are_per_owner(client, auth_headers, new_user):
+    other = new_user()
+    etag = client.get("/items/", headers=auth_headers).headers["etag"]
+    assert client.get("/items/", headers={**other, "If-None-Match": etag}).status_code == 200
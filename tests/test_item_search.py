@@ -0,0 +1,44 @@
+# tests/test_item_search.py
+import random
+
+
+def _search(client, headers, q, limit, after=None):
+    params = {"q": q, "limit": limit}
+    if after:
+        params["after"] = after
+    r = client.get("/items/search", params=params, headers=headers)
+    assert r.status_code == 200, r.text
+    return [i["id"] for i in r.json()], r.headers.get("x-next-after")
+
+
+def test_pages_cover_every_match_once_in_rank_order(client, auth_headers, new_user):
+    rnd = random.Random(7)
+    words = ["apple", "pear", "plum", "fig"]
+    rows = [
+        {"title": " ".join(rnd.choices(words, k=2)), "description": " ".join(rnd.choices(words, k=rnd.randint(0, 6)))}
+        for _ in range(60)
+    ]
+    ids = client.post("/items/bulk", json=rows, headers=auth_headers).json()["created_ids"]
+    expected = {i for i, row in zip(ids, rows) if "apple" in f"{row['title']} {row['description']}"}
+    # another owner's apples never show up
+    client.post("/items/", json={"title": "apple"}, headers=new_user())
+
+    everything, _ = _search(client, auth_headers, "appl", 1000)
+    assert set(everything) == expected
+
+    paged, after, scores = [], None, []
+    while True:
+        page, after = _search(client, auth_headers, "appl", 7, after)
+        paged += page
+        if not after:
+            break
+        scores.append(float(after.rpartition(":")[0]))
+    assert paged == everything
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_rejects_bad_cursors(client, auth_headers):
+    client.post("/items/", json={"title": "kiwi"}, headers=auth_headers)
+    for after in ("zz", "1.0", "nan:3", "inf:3"):
+        r = client.get("/items/search", params={"q": "kiwi", "after": after}, headers=auth_headers)
+        assert r.status_code == 400, after
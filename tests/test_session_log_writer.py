@@ -0,0 +1,34 @@
+# tests/test_session_log_writer.py
+import asyncio
+import threading
+
+from app.services.session_log_writer import SessionLogWriter
+
+
+def test_full_buffer_is_never_written_on_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = SessionLogWriter(buffer_bytes=1, flush_interval_ms=60000, compress=False)
+    flushed_in = []
+    flush = writer.flush
+
+    def record_thread(session_id=None):
+        flushed_in.append(threading.current_thread())
+        flush(session_id)
+
+    monkeypatch.setattr(writer, "flush", record_thread)
+
+    async def main():
+        # not started yet, as before the lifespan runs
+        writer.append("s1", "line", ["ts", "GET", "/", 200, "ip", "ua", ""])
+        assert writer.running
+        for _ in range(100):
+            if flushed_in:
+                break
+            await asyncio.sleep(0.01)
+        await writer.stop()
+        writer.append("s1", "late", ["ts", "GET", "/", 200, "ip", "ua", ""])
+
+    asyncio.run(main())
+    assert flushed_in and threading.main_thread() not in flushed_in
+    assert (tmp_path / "logs").exists()
+    assert writer.stats()["dropped"] == 1
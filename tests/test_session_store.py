@@ -0,0 +1,80 @@
+# tests/test_session_store.py
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.database import SessionLocal
+from app.models.logs import UserSession
+from app.models.user import User
+from app.services import session_store
+from app.services.session_store import WriteBehindSessionStore
+from app.utils.cache import TTLCache
+
+
+@pytest.fixture
+def user_id(request):
+    with SessionLocal() as db:
+        name = request.node.name
+        uid = db.execute(insert(User).values(username=name, email=f"{name}@example.com", hashed_password="x").returning(User.id)).scalar_one()
+        db.commit()
+    return uid
+
+
+def _store(journal_dir) -> WriteBehindSessionStore:
+    return WriteBehindSessionStore(TTLCache(), journal_dir=str(journal_dir))
+
+
+def _sessions(user_id: int):
+    with SessionLocal() as db:
+        return dict(db.execute(select(UserSession.id, UserSession.active).where(UserSession.user_id == user_id)).all())
+
+
+def test_recover_replays_the_journal_of_a_dead_worker(tmp_path, user_id):
+    dead = _store(tmp_path)
+    opened = asyncio.run(dead.create(None, user_id, "10.0.0.1", "ua"))
+    ended = asyncio.run(dead.create(None, user_id, "10.0.0.1", "ua"))
+    asyncio.run(dead.end(None, ended))
+    # the worker dies: its lock goes with the file handle, nothing was persisted
+    dead._journal.close()
+    assert _sessions(user_id) == {}
+
+    survivor = _store(tmp_path)
+    survivor.recover()
+    assert survivor.replayed == 3
+    assert _sessions(user_id) == {opened: True, ended: False}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_recover_leaves_a_live_workers_segment_alone(tmp_path, user_id):
+    live = _store(tmp_path)
+    session_id = asyncio.run(live.create(None, user_id, "10.0.0.1", "ua"))
+    # only published, locked segments are visible to recover()
+    assert [p.suffix for p in tmp_path.iterdir()] == [".jsonl"]
+
+    other = _store(tmp_path)
+    other.recover()
+    assert other.replayed == 0
+    assert live._journal_path.exists()
+
+    asyncio.run(live.stop())
+    assert _sessions(user_id) == {session_id: True}
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.skipif(session_store.fcntl is None, reason="no journal locking")
+def test_recover_never_sees_a_segment_before_it_is_locked(tmp_path, user_id, monkeypatch):
+    other = _store(tmp_path)
+    flock = session_store.fcntl.flock
+
+    def recover_first(fd, operation):
+        # a recover() landing between creating the segment and locking it
+        if operation == session_store.fcntl.LOCK_EX:
+            other.recover()
+        return flock(fd, operation)
+
+    monkeypatch.setattr(session_store.fcntl, "flock", recover_first)
+    live = _store(tmp_path)
+    asyncio.run(live.create(None, user_id, "10.0.0.1", "ua"))
+    assert live._journal_path.exists()
+    assert other.replayed == 0
@@ -0,0 +1,45 @@
+# tests/test_token_revocation.py
+import pytest
+from jose import JWTError
+
+from app.utils import jwt_utils
+from app.utils.cache import ExpiringSet
+from app.utils.jwt_utils import create_access_token, decode_access_token, revoke_token
+
+
+@pytest.fixture
+def small_revocation_list(monkeypatch):
+    revoked = ExpiringSet(maxsize=10)
+    monkeypatch.setattr(jwt_utils, "revoked_tokens", revoked)
+    jwt_utils.token_cache.clear()
+    return revoked
+
+
+def test_revoked_token_stays_rejected_after_many_logouts(small_revocation_list):
+    token = create_access_token({"sub": "alice"})
+    assert decode_access_token(token).username == "alice"
+    assert revoke_token(token)
+
+    # junk bearer strings are not revocations and take no room
+    for i in range(1000):
+        assert revoke_token(f"junk.{i}.token")
+        assert revoke_token(create_access_token({"sub": f"u{i}"}) + "x")
+    assert len(small_revocation_list) == 1
+
+    # real ones fill the list, then are refused rather than evicting
+    others = [create_access_token({"sub": f"user{i}"}) for i in range(20)]
+    results = [revoke_token(t) for t in others]
+    assert results == [True] * 9 + [False] * 11
+    decode_access_token(others[-1])
+
+    with pytest.raises(JWTError):
+        decode_access_token(token)
+
+
+def test_revoking_twice_is_a_no_op(small_revocation_list):
+    token = create_access_token({"sub": "bob"})
+    assert revoke_token(token)
+    assert revoke_token(token)
+    assert len(small_revocation_list) == 1
+    with pytest.raises(JWTError):
+        decode_access_token(token)
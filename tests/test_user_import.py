@@ -0,0 +1,35 @@
+# tests/test_user_import.py
+import json
+
+from app.services.user_import import RecordReader
+
+
+def _feed_in_pieces(reader: RecordReader, data: bytes, size: int):
+    records = []
+    for start in range(0, len(data), size):
+        records.extend(reader.feed(data[start:start + size]))
+    return records + reader.feed(b"", final=True)
+
+
+def test_ndjson_records_end_at_newlines_only():
+    names = ["a\u2028b", "c\u2029d", "e\u0085f", "g\x0bh", "i\x0cj", "k\x1cl"]
+    data = "".join(json.dumps({"username": n}, ensure_ascii=False) + "\r\n" for n in names).encode()
+    for size in (1, 3, len(data)):
+        records = _feed_in_pieces(RecordReader("ndjson"), data, size)
+        assert [r for _, r in records] == [{"username": n} for n in names]
+        assert [i for i, _ in records] == list(range(len(names)))
+
+
+def test_ndjson_last_record_without_newline():
+    records = _feed_in_pieces(RecordReader("ndjson"), b'{"username": "a"}\n\n{"username": "b"}', 4)
+    assert [r for _, r in records] == [{"username": "a"}, {"username": "b"}]
+
+
+def test_csv_quoted_field_across_chunks():
+    data = 'username,email,password,full_name\r\nann,ann@example.com,pw,"Ann\nLee "\r\nbo,bo@example.com,pw,\r\n'.encode()
+    for size in (1, 5, len(data)):
+        records = _feed_in_pieces(RecordReader("csv"), data, size)
+        assert [r for _, r in records] == [
+            {"username": "ann", "email": "ann@example.com", "password": "pw", "full_name": "Ann\nLee "},
+            {"username": "bo", "email": "bo@example.com", "password": "pw"},
+        ]